@@ -4,4 +4,7 @@
 class AuthenticationConfig(AppConfig):
     name = 'apps.authentication'
     label = 'authentication'  # Use a simple label without dots
-    verbose_name = 'Authentication'
\ No newline at end of file
+    verbose_name = 'Authentication'
+
+    def ready(self):
+        from . import signals  # noqa: F401
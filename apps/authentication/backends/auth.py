@@ -1,56 +1,56 @@
 # apps/authentication/backends/auth.py
 from django.contrib.auth.backends import ModelBackend
-from django.db import connections
-from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
 from django.db.utils import DatabaseError
+from django.utils.crypto import constant_time_compare
 import logging
 
+from apps.authentication.models import Usuarios
+from apps.authentication.usuarios import obtener_usuario
+
 logger = logging.getLogger(__name__)
 
+
+def _guardar_hash(usuario, contraseña):
+    usuario.contraseña_hash = make_password(contraseña)
+    usuario.save(update_fields=['contraseña_hash'])
+
+
+def verificar_contraseña(usuario, contraseña):
+    """
+    Comprueba la contraseña con una sola verificación. Las contraseñas que aún
+    están guardadas en texto plano se comparan tal cual y, si coinciden, se
+    reemplazan por su hash; los hashes con un algoritmo antiguo se actualizan
+    igual que en Django.
+    """
+    guardada = usuario.contraseña_hash or ''
+    try:
+        identify_hasher(guardada)
+    except ValueError:
+        if not guardada or not constant_time_compare(contraseña, guardada):
+            return False
+        _guardar_hash(usuario, contraseña)
+        return True
+    return check_password(contraseña, guardada, setter=lambda crudo: _guardar_hash(usuario, crudo))
+
+
 class CustomAuthBackend(ModelBackend):
     def authenticate(self, request, nombre_usuario=None, contraseña_hash=None, **kwargs):
+        # `contraseña_hash` es la contraseña escrita por el usuario (nombre histórico)
         if not nombre_usuario or not contraseña_hash:
             return None
 
         try:
-            with connections['default'].cursor() as cursor:
-                cursor.execute("""
-                    SELECT u.usuario_id, u.nombre_usuario, u.contraseña_hash, r.tipo as rol
-                    FROM [dbo].[Usuarios] u
-                    JOIN [dbo].[Rol] r ON u.rol_id = r.id
-                    WHERE u.nombre_usuario = %s
-                """, [nombre_usuario])
-                user_data = cursor.fetchone()
-
-            if user_data and self.check_password(contraseña_hash, user_data[2]):
-                User = get_user_model()
-                try:
-                    user = User.objects.get(nombre_usuario=user_data[1])
-                except User.DoesNotExist:
-                    user = User(nombre_usuario=user_data[1])
-                    user.set_unusable_password()
-                    user.save()
-                
-                # Guardar el rol en la sesión
-                request.session['user_role'] = user_data[3].lower()
-                # Establecer el backend en el usuario antes de retornarlo
-                user.backend = 'apps.authentication.backends.auth.CustomAuthBackend'
-                return user
-
+            # Usuario y rol en una sola consulta
+            user = Usuarios.objects.select_related('rol').filter(nombre_usuario=nombre_usuario).first()
+            if user is None or not verificar_contraseña(user, contraseña_hash):
+                return None
         except DatabaseError as e:
             logger.error(f"Database error during authentication: {e}")
             return None
 
-        return None
+        return user
 
     def get_user(self, user_id):
-        User = get_user_model()
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
-
-    def check_password(self, raw_password, hashed_password):
-        # Implementa la lógica de verificación de contraseña
-        # Por ahora, comparación directa (no seguro para producción)
-        return raw_password == hashed_password
\ No newline at end of file
+        # Usuario y rol en una sola consulta, cacheados unos segundos
+        return obtener_usuario(user_id)
@@ -0,0 +1,11 @@
+"""
+Hash de contraseñas en procesos hijos. Este módulo no importa modelos para
+que los procesos del pool puedan cargarlo sin inicializar las apps de Django;
+make_password solo necesita los settings, que se leen de
+DJANGO_SETTINGS_MODULE.
+"""
+from django.contrib.auth.hashers import make_password
+
+
+def hashear_lote(contraseñas):
+    return [make_password(contraseña) for contraseña in contraseñas]
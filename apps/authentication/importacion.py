@@ -0,0 +1,143 @@
+"""
+Alta masiva de usuarios desde CSV o JSON (comando importar_usuarios y la
+subida en gestion_usuarios.html). Las contraseñas se hashean en paralelo en
+un ProcessPoolExecutor, los nombres existentes se comprueban en una consulta
+y los usuarios se insertan con bulk_create por lotes.
+"""
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from django.db import transaction
+
+from web_project.catalogos import obtener_catalogo
+
+from .hashing import hashear_lote
+from .models import Usuarios
+
+# Filas por INSERT; Usuarios tiene 4 columnas y SQL Server admite 2100 parámetros
+LOTE_IMPORTACION = 500
+
+# Nombres por consulta de existencia, por debajo del mismo límite
+LOTE_NOMBRES = 2000
+
+# Contraseñas por tarea enviada al pool
+LOTE_HASH = 50
+
+# Límites de la subida desde gestion_usuarios.html, que hashea en el propio
+# proceso web (unos 0,5 s por contraseña); los ficheros más grandes se
+# importan con el comando importar_usuarios
+MAX_FILAS_SUBIDA = 25
+MAX_BYTES_SUBIDA = 256 * 1024
+
+FORMATOS = ('csv', 'json')
+
+VALORES_FALSOS = {'0', 'false', 'no', 'inactivo', 'n'}
+
+
+@dataclass
+class ResultadoImportacion:
+    creados: int = 0
+    # (número de fila, mensaje); las filas se cuentan desde 1 sin la cabecera
+    errores: List[Tuple[int, str]] = field(default_factory=list)
+
+
+def formato_de(nombre_fichero):
+    extension = os.path.splitext(nombre_fichero or '')[1].lstrip('.').lower()
+    return extension if extension in FORMATOS else None
+
+
+def leer_usuarios(contenido, formato):
+    """
+    Filas (diccionarios) de un CSV con cabecera o de una lista JSON de objetos.
+    Columnas: nombre_usuario, password, rol (tipo o id) y estado (opcional).
+    """
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode('utf-8-sig')
+    if formato == 'csv':
+        return list(csv.DictReader(io.StringIO(contenido)))
+    if formato == 'json':
+        filas = json.loads(contenido)
+        if not isinstance(filas, list) or not all(isinstance(fila, dict) for fila in filas):
+            raise ValueError('El JSON debe ser una lista de objetos')
+        return filas
+    raise ValueError(f'Formato no soportado: {formato}')
+
+
+def _roles():
+    """Rol por tipo (sin mayúsculas) y por id, desde el catálogo."""
+    roles = {}
+    for rol in obtener_catalogo('roles'):
+        roles[rol['tipo'].strip().lower()] = rol['id']
+        roles[str(rol['id'])] = rol['id']
+    return roles
+
+
+def _hashear(contraseñas, workers):
+    if workers == 1 or len(contraseñas) <= LOTE_HASH:
+        return hashear_lote(contraseñas)
+    lotes = [contraseñas[i:i + LOTE_HASH] for i in range(0, len(contraseñas), LOTE_HASH)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [hash_ for lote in pool.map(hashear_lote, lotes) for hash_ in lote]
+
+
+def importar_usuarios(filas, workers=None, dry_run=False):
+    """
+    Valida las filas y crea los usuarios válidos. Una fila con errores no
+    impide crear las demás. Devuelve un ResultadoImportacion.
+    """
+    resultado = ResultadoImportacion()
+    roles = _roles()
+
+    validas = []
+    vistos = set()
+    for numero, fila in enumerate(filas, start=1):
+        nombre = str(fila.get('nombre_usuario') or '').strip()
+        contraseña = str(fila.get('password') or '')
+        rol_id = roles.get(str(fila.get('rol') or '').strip().lower())
+        if not nombre or not contraseña:
+            resultado.errores.append((numero, 'nombre_usuario y password son obligatorios'))
+        elif len(nombre) > Usuarios._meta.get_field('nombre_usuario').max_length:
+            resultado.errores.append((numero, f'El nombre de usuario "{nombre}" es demasiado largo'))
+        elif rol_id is None:
+            resultado.errores.append((numero, f'Rol desconocido: {fila.get("rol")}'))
+        elif nombre in vistos:
+            resultado.errores.append((numero, f'El nombre de usuario "{nombre}" está repetido en el fichero'))
+        else:
+            vistos.add(nombre)
+            estado = str(fila.get('estado', '1')).strip().lower() not in VALORES_FALSOS
+            validas.append((numero, nombre, contraseña, rol_id, estado))
+
+    # Nombres ya registrados
+    nombres = [nombre for _numero, nombre, *_resto in validas]
+    existentes = set()
+    for inicio in range(0, len(nombres), LOTE_NOMBRES):
+        existentes.update(
+            Usuarios.objects.filter(nombre_usuario__in=nombres[inicio:inicio + LOTE_NOMBRES])
+            .values_list('nombre_usuario', flat=True)
+        )
+    nuevas = []
+    for numero, nombre, contraseña, rol_id, estado in validas:
+        if nombre in existentes:
+            resultado.errores.append((numero, f'El nombre de usuario "{nombre}" ya está en uso'))
+        else:
+            nuevas.append((nombre, contraseña, rol_id, estado))
+    resultado.errores.sort()
+
+    if dry_run or not nuevas:
+        resultado.creados = len(nuevas)
+        return resultado
+
+    hashes = _hashear([contraseña for _nombre, contraseña, *_resto in nuevas], workers or os.cpu_count() or 1)
+    usuarios = [
+        Usuarios(nombre_usuario=nombre, contraseña_hash=hash_, rol_id=rol_id, estado=estado)
+        for (nombre, _contraseña, rol_id, estado), hash_ in zip(nuevas, hashes)
+    ]
+    with transaction.atomic():
+        Usuarios.objects.bulk_create(usuarios, batch_size=LOTE_IMPORTACION)
+    resultado.creados = len(usuarios)
+    return resultado
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.authentication.importacion import FORMATOS, formato_de, importar_usuarios, leer_usuarios
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea usuarios en bloque desde un CSV (con cabecera) o una lista JSON con "
+        "nombre_usuario, password, rol (tipo o id) y estado opcional. Las "
+        "contraseñas se hashean en paralelo en varios procesos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichero', help='Ruta del CSV o JSON.')
+        parser.add_argument(
+            '--formato',
+            choices=FORMATOS,
+            help='Formato del fichero (por defecto se deduce de la extensión).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Procesos para hashear contraseñas (por defecto uno por núcleo).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo valida el fichero e informa de cuántos usuarios se crearían.',
+        )
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or formato_de(options['fichero'])
+        if formato is None:
+            raise CommandError('No se puede deducir el formato; usa --formato csv|json.')
+        try:
+            with open(options['fichero'], 'rb') as fichero:
+                filas = leer_usuarios(fichero.read(), formato)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'No se pudo leer el fichero: {e}')
+
+        resultado = importar_usuarios(filas, workers=options['workers'], dry_run=options['dry_run'])
+        for numero, mensaje in resultado.errores:
+            self.stderr.write(f'Fila {numero}: {mensaje}')
+        verbo = 'Se crearían' if options['dry_run'] else 'Se crearon'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verbo} {resultado.creados} usuarios; {len(resultado.errores)} filas con errores.'
+        ))
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Usuarios
+from .usuarios import invalidar_usuario
+
+
+@receiver(post_save, sender=Usuarios)
+@receiver(post_delete, sender=Usuarios)
+def invalidar_usuario_cacheado(sender, instance, **kwargs):
+    """Cualquier cambio (p. ej. editar_usuario) descarta el usuario cacheado."""
+    invalidar_usuario(instance.pk)
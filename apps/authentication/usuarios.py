@@ -0,0 +1,38 @@
+"""
+Resolución del usuario autenticado y su rol. Cada petición autenticada pasa
+por CustomAuthBackend.get_user; el usuario se carga con su rol en una sola
+consulta (JOIN) y se guarda unos segundos en el caché, de modo que
+request.user.rol ya está resuelto para los context processors y las vistas.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Usuarios
+
+# Segundos que se reutiliza un usuario cacheado; acota el desfase si la tabla
+# Usuarios se modifica fuera de Django
+USUARIOS_CACHE_TIMEOUT = getattr(settings, 'USUARIOS_CACHE_TIMEOUT', 60)
+
+
+def _clave(usuario_id):
+    return f'usuarios:{usuario_id}'
+
+
+def obtener_usuario(usuario_id):
+    """Usuario con su rol ya cargado, o None si no existe."""
+    clave = _clave(usuario_id)
+    usuario = cache.get(clave)
+    if usuario is None:
+        # Sin el hash de la contraseña: el caché puede estar en disco y la
+        # autenticación la lee de la base de datos (CustomAuthBackend.authenticate)
+        usuario = Usuarios.objects.select_related('rol').defer('contraseña_hash').filter(pk=usuario_id).first()
+        if usuario is None:
+            return None
+        cache.set(clave, usuario, timeout=USUARIOS_CACHE_TIMEOUT)
+    return usuario
+
+
+def invalidar_usuario(usuario_id):
+    # Tras el commit, para que nadie vuelva a cachear los datos anteriores
+    transaction.on_commit(lambda: cache.delete(_clave(usuario_id)))
@@ -8,7 +8,6 @@
 from web_project.template_helpers.theme import TemplateHelper
 from django.contrib.auth.hashers import make_password
 from ..dashboards.user_views import GestionUsuariosView
-from django.contrib.auth.hashers import check_password
 from apps.authentication.models import Usuarios
 from django.shortcuts import redirect
 
@@ -59,20 +58,11 @@ def login_view(request):
     if request.method == "POST":
         username = request.POST.get("nombre_usuario") 
         password = request.POST.get("password")
-        try:
-            user = Usuarios.objects.get(nombre_usuario=username)
-        except Usuarios.DoesNotExist:
-            user = None
-
+        # Una consulta (usuario y rol) y una verificación de contraseña
+        user = authenticate(request, nombre_usuario=username, contraseña_hash=password)
         if user is not None:
-            if user.contraseña_hash == password:
-                user_auth = authenticate(request, nombre_usuario=username, contraseña_hash=password)
-                auth_login(request, user_auth)
-                return redirect("/welcome")
-            elif check_password(password, user.contraseña_hash):     
-                user_auth = authenticate(request, nombre_usuario=username, contraseña_hash=user.contraseña_hash)
-                auth_login(request, user_auth)
-                return redirect("/welcome")
+            auth_login(request, user)
+            return redirect("/welcome")
  
         messages.error(request, "Usuario o contraseña inválidos")
 
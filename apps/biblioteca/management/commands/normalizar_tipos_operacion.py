@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.biblioteca.models import Biblioteca_Contenido, normalizar_tipo_operacion
+from web_project.catalogos import invalidar_tabla
+
+LOTE_ACTUALIZACION = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Rellena Biblioteca_Contenido.tipo_operacion a partir del texto libre de "
+        "Biblioteca_Contenido.tipo en las filas existentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa de cuántas filas cambiarían.',
+        )
+
+    def handle(self, *args, **options):
+        # ids agrupados por el valor que les corresponde
+        por_tipo = {}
+        filas = Biblioteca_Contenido.objects.values_list('pk', 'tipo', 'tipo_operacion')
+        for pk, tipo, actual in filas.iterator(chunk_size=LOTE_ACTUALIZACION):
+            nuevo = normalizar_tipo_operacion(tipo)
+            if nuevo != actual:
+                por_tipo.setdefault(nuevo, []).append(pk)
+        total = sum(len(ids) for ids in por_tipo.values())
+
+        if options['dry_run']:
+            self.stdout.write(f"Se actualizarían {total} contenidos.")
+            return
+
+        # Actualización por lotes para no superar el límite de parámetros de SQL Server
+        with transaction.atomic():
+            for tipo_operacion, ids in por_tipo.items():
+                for inicio in range(0, len(ids), LOTE_ACTUALIZACION):
+                    Biblioteca_Contenido.objects.filter(
+                        pk__in=ids[inicio:inicio + LOTE_ACTUALIZACION]
+                    ).update(tipo_operacion=tipo_operacion)
+            # update() no dispara señales: se invalidan a mano el catálogo y las instantáneas
+            transaction.on_commit(lambda: invalidar_tabla(Biblioteca_Contenido))
+
+        self.stdout.write(self.style.SUCCESS(f"Se actualizaron {total} contenidos."))
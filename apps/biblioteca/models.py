@@ -1,6 +1,35 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from ..authentication.models import Usuarios
+from ..misiones.models import TIPO_OPERACION_CHOICES
+
+# Raíces para reconocer variantes escritas a mano ("Multiplicaciones", "divisiones"...)
+RAICES_TIPO_OPERACION = (
+    ('suma', 'suma'),
+    ('resta', 'resta'),
+    ('multiplicacion', 'multiplic'),
+    ('division', 'divis'),
+)
+
+
+def normalizar_tipo_operacion(texto):
+    """
+    Tipo de operación (uno de TIPO_OPERACION_CHOICES) que corresponde al texto
+    libre de Biblioteca_Contenido.tipo, o None si no se reconoce.
+    """
+    s = (texto or '').strip().lower()
+    # normalizar acentos comunes
+    s = (s
+         .replace('á', 'a')
+         .replace('é', 'e')
+         .replace('í', 'i')
+         .replace('ó', 'o')
+         .replace('ú', 'u'))
+    for tipo, raiz in RAICES_TIPO_OPERACION:
+        if raiz in s:
+            return tipo
+    return None
+
 
 class Biblioteca(models.Model):
     TIPO_CHOICES = [
@@ -53,6 +82,11 @@ class Biblioteca_Contenido(models.Model):
     pasos_trucos = models.TextField('Pasos y Trucos', db_column='pasos_trucos')
     ejemplo = models.TextField('Ejemplo', db_column='ejemplo')
     tipo = models.TextField('Tipo', db_column='tipo')
+    # `tipo` normalizado al guardar; desbloquea las misiones de esa operación
+    tipo_operacion = models.CharField(
+        'Tipo de operación', max_length=20, choices=TIPO_OPERACION_CHOICES,
+        null=True, blank=True, db_index=True, db_column='tipo_operacion',
+    )
     class Meta:
         db_table = 'Biblioteca_Contenido'   
         managed = False  
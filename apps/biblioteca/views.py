@@ -4,9 +4,19 @@
 from django.views.generic import TemplateView
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q
+from django.views.decorators.cache import cache_control
+from django.db.models import F, Q
 from web_project import TemplateLayout
-from .models import Biblioteca, Biblioteca_Contenido, Biblioteca_Usuario, PolyaBiblioteca, Sumandos_Biblioteca
+from .models import (
+    Biblioteca,
+    Biblioteca_Contenido,
+    Biblioteca_Usuario,
+    PolyaBiblioteca,
+    Sumandos_Biblioteca,
+    normalizar_tipo_operacion,
+)
+from apps.misiones.upsert import upsert
+from apps.misiones.condicional import condicion_por_version
 import random
 import json
 
@@ -22,7 +32,9 @@ def get_context_data(self, **kwargs):
         activo_filter = self.request.GET.get('activo')
         
         # Get all biblioteca items with user information
-        contenidos = Biblioteca.objects.select_related('usuario').all()
+        contenidos = Biblioteca.objects.select_related('usuario').annotate(
+            tipo_operacion=F('detalle_contenido__tipo_operacion')
+        )
         
         # Apply filters
         if search_query:
@@ -47,6 +59,7 @@ def get_context_data(self, **kwargs):
                 'descripcion': contenido.descripcion,
                 'tipo': contenido.tipo,
                 'activo': contenido.activo,
+                'tipo_operacion': contenido.tipo_operacion,
                 'usuario': contenido.usuario.nombre_usuario if contenido.usuario else 'Sin usuario',
                 })
         
@@ -79,11 +92,14 @@ def crear_contenido(request):
                 teoria = request.POST.get('teoria', '')
                 pasos_trucos = request.POST.get('pasos_trucos', '')
                 ejemplo = request.POST.get('ejemplo', '')
+                tipo_operacion = request.POST.get('tipo_operacion', '')
                 detalle = Biblioteca_Contenido.objects.create(
                     biblioteca=contenido,
                     teoria=teoria,
                     pasos_trucos=pasos_trucos,
-                    ejemplo=ejemplo
+                    ejemplo=ejemplo,
+                    tipo=tipo_operacion,
+                    tipo_operacion=normalizar_tipo_operacion(tipo_operacion),
                 )
                 contenido_detalle_id = detalle.biblioteca_contenido_id
             
@@ -131,6 +147,14 @@ def actualizar_contenido(request):
         biblioteca.activo = data.get('activo', biblioteca.activo)
         
         biblioteca.save()
+
+        # Operación del contenido, normalizada igual que en crear_contenido
+        if 'tipo_operacion' in data:
+            detalle = Biblioteca_Contenido.objects.filter(biblioteca=biblioteca).first()
+            if detalle is not None:
+                detalle.tipo = data['tipo_operacion']
+                detalle.tipo_operacion = normalizar_tipo_operacion(data['tipo_operacion'])
+                detalle.save(update_fields=['tipo', 'tipo_operacion'])
         
         return JsonResponse({'success': True})
         
@@ -288,34 +312,31 @@ def guardar_polya_biblioteca(request):
         except Biblioteca.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'Contenido de biblioteca no encontrado'}, status=404)
 
-        # Obtener o crear el registro de Pólya
-        polya, created = PolyaBiblioteca.objects.get_or_create(
-            usuario=request.user,
-            biblioteca=biblioteca
-        )
-
-        # Actualizar campos del método de Pólya
-        polya.identificacion_operacion = request.POST.get('identificacion_operacion', '')
-        polya.por_que_esa_operacion = request.POST.get('por_que_esa_operacion', '')
-        polya.que_se_pide = request.POST.get('que_se_pide', '')
-        polya.datos_conocidos = request.POST.get('datos_conocidos', '')
-        polya.incognitas = request.POST.get('incognitas', '')
-        polya.representacion = request.POST.get('representacion', '')
-        polya.estrategia_principal = request.POST.get('estrategia_principal', '')
-        polya.desarrollo = request.POST.get('desarrollo', '')
-        polya.resultados_intermedios = request.POST.get('resultados_intermedios', '')
-        polya.revision_verificacion = request.POST.get('revision_verificacion', '')
-        polya.comprobacion_otro_metodo = request.POST.get('comprobacion_otro_metodo', '')
-        polya.conclusion_final = request.POST.get('conclusion_final', '')
+        valores = {
+            'identificacion_operacion': request.POST.get('identificacion_operacion', ''),
+            'por_que_esa_operacion': request.POST.get('por_que_esa_operacion', ''),
+            'que_se_pide': request.POST.get('que_se_pide', ''),
+            'datos_conocidos': request.POST.get('datos_conocidos', ''),
+            'incognitas': request.POST.get('incognitas', ''),
+            'representacion': request.POST.get('representacion', ''),
+            'estrategia_principal': request.POST.get('estrategia_principal', ''),
+            'desarrollo': request.POST.get('desarrollo', ''),
+            'resultados_intermedios': request.POST.get('resultados_intermedios', ''),
+            'revision_verificacion': request.POST.get('revision_verificacion', ''),
+            'comprobacion_otro_metodo': request.POST.get('comprobacion_otro_metodo', ''),
+            'conclusion_final': request.POST.get('conclusion_final', ''),
+        }
         
+        # La confianza solo se sobrescribe cuando llega un valor válido
         confianza = request.POST.get('confianza')
         if confianza:
             try:
-                polya.confianza = int(confianza)
+                valores['confianza'] = int(confianza)
             except ValueError:
                 pass
 
-        polya.save()
+        # Crear o actualizar el registro de Pólya en una sola sentencia atómica
+        polya = upsert(PolyaBiblioteca, {'usuario': request.user, 'biblioteca': biblioteca}, valores)
 
         # Guardar sumandos
         sumandos_json = request.POST.get('sumandos')
@@ -344,8 +365,26 @@ def guardar_polya_biblioteca(request):
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
+def _version_polya_biblioteca(request):
+    """Versión del trabajo de Pólya del usuario para el contenido pedido."""
+    try:
+        biblioteca_id = int(request.GET.get('biblioteca_id', ''))
+    except ValueError:
+        return None
+    fila = (
+        PolyaBiblioteca.objects.filter(usuario_id=request.user.pk, biblioteca_id=biblioteca_id)
+        .values_list('id', 'updated_at')
+        .first()
+    )
+    if fila is None or fila[1] is None:
+        return None
+    return f"{fila[0]}:{fila[1].isoformat()}", fila[1]
+
+
 @login_required
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condicion_por_version(_version_polya_biblioteca)
 def cargar_polya_biblioteca(request):
     """Carga el trabajo de Pólya para un contenido de biblioteca"""
     try:
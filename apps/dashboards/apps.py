@@ -4,3 +4,7 @@
 class DashboardsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.dashboards"
+
+    def ready(self):
+        # Conecta la invalidación del caché de catálogos a las señales de los modelos
+        import web_project.catalogos  # noqa: F401
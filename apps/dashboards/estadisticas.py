@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+from typing import List
+
+from apps.misiones.snapshot import obtener_snapshot
+from web_project.catalogos import obtener_catalogo
+
+
+def _porcentaje(parte, total):
+    return round((parte / total * 100), 1) if total > 0 else 0
+
+
+@dataclass(frozen=True)
+class HabilidadUsuario:
+    nombre: str
+    porcentaje_avance: int
+
+    @property
+    def tiene_habilidad(self) -> bool:
+        return self.porcentaje_avance > 0
+
+
+@dataclass(frozen=True)
+class EstadisticasDashboard:
+    """Estadísticas del dashboard del estudiante, listas para la plantilla."""
+    misiones_totales: int
+    misiones_completadas: int
+    misiones_en_progreso: int
+    total_intentos: int
+    intentos_completados: int
+    misiones_semana_actual: int
+    misiones_semana_anterior: int
+    habilidades: List[HabilidadUsuario]
+
+    @property
+    def misiones_pendientes(self) -> int:
+        return max(self.misiones_totales - self.misiones_completadas - self.misiones_en_progreso, 0)
+
+    @property
+    def total_habilidades(self) -> int:
+        return len(self.habilidades)
+
+    @property
+    def tasa_exito(self) -> float:
+        return _porcentaje(self.intentos_completados, self.total_intentos)
+
+    @property
+    def porcentaje_completadas(self) -> float:
+        return _porcentaje(self.misiones_completadas, self.misiones_totales)
+
+    @property
+    def porcentaje_en_progreso(self) -> float:
+        return _porcentaje(self.misiones_en_progreso, self.misiones_totales)
+
+    @property
+    def porcentaje_pendientes(self) -> float:
+        return _porcentaje(self.misiones_pendientes, self.misiones_totales)
+
+    @property
+    def tendencia_porcentaje(self) -> int:
+        if self.misiones_semana_anterior <= 0:
+            return 0
+        diferencia = self.misiones_semana_actual - self.misiones_semana_anterior
+        return abs(round((diferencia / self.misiones_semana_anterior) * 100))
+
+    @property
+    def tendencia_texto(self) -> str:
+        if self.misiones_semana_anterior <= 0:
+            return 'sin cambios'
+        return 'aumento' if self.misiones_semana_actual >= self.misiones_semana_anterior else 'disminución'
+
+    @property
+    def tendencia_clase(self) -> str:
+        if self.misiones_semana_anterior <= 0:
+            return 'secondary'
+        return 'success' if self.misiones_semana_actual >= self.misiones_semana_anterior else 'danger'
+
+
+def estadisticas_dashboard(usuario) -> EstadisticasDashboard:
+    """
+    Reúne las estadísticas del dashboard a partir de la instantánea del
+    estudiante (fila de Estadistica_Estudiante y progreso por habilidad) y de
+    los catálogos de habilidades y misiones. Con el caché caliente no hace
+    ninguna consulta.
+    """
+    snapshot = obtener_snapshot(usuario)
+    estadistica = snapshot.estadistica_estudiante()
+
+    habilidades = [
+        HabilidadUsuario(
+            nombre=habilidad['nombre'],
+            porcentaje_avance=snapshot.progreso_habilidades.get(habilidad['habilidad_id']) or 0,
+        )
+        for habilidad in obtener_catalogo('habilidades')
+    ]
+
+    return EstadisticasDashboard(
+        misiones_totales=len(obtener_catalogo('misiones')),
+        misiones_completadas=estadistica.misiones_completadas,
+        misiones_en_progreso=estadistica.misiones_en_progreso,
+        total_intentos=estadistica.total_intentos,
+        intentos_completados=estadistica.intentos_completados,
+        misiones_semana_actual=estadistica.completadas_semana_actual,
+        misiones_semana_anterior=estadistica.completadas_semana_anterior,
+        habilidades=habilidades,
+    )
@@ -0,0 +1,108 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.contrib.auth.decorators import login_required
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_http_methods
+
+from apps.misiones.models import IntentoMision, PolyaTrabajoUM
+from apps.biblioteca.models import PolyaBiblioteca
+
+# Filas leídas por viaje al servidor mientras se recorre el cursor
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _campos(modelo, extra):
+    return [f.attname for f in modelo._meta.concrete_fields] + extra
+
+
+# recurso -> (modelo, columnas, campo de fecha, parámetro GET -> campo filtrado)
+EXPORTACIONES = {
+    'intentos': (
+        IntentoMision,
+        _campos(IntentoMision, ['usuario__nombre_usuario', 'mision__titulo']),
+        'fecha_intento',
+        {'usuario': 'usuario_id', 'mision': 'mision_id'},
+    ),
+    'polya': (
+        PolyaTrabajoUM,
+        _campos(PolyaTrabajoUM, ['usuario__nombre_usuario', 'mision__titulo']),
+        'updated_at',
+        {'usuario': 'usuario_id', 'mision': 'mision_id'},
+    ),
+    'polya-biblioteca': (
+        PolyaBiblioteca,
+        _campos(PolyaBiblioteca, ['usuario__nombre_usuario', 'biblioteca__titulo']),
+        'updated_at',
+        {'usuario': 'usuario_id', 'biblioteca': 'biblioteca_id'},
+    ),
+}
+
+
+class Echo:
+    """Pseudo-buffer para csv.writer: devuelve cada línea en lugar de guardarla."""
+    def write(self, value):
+        return value
+
+
+def _filas_csv(columnas, filas):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columnas)
+    for fila in filas:
+        yield writer.writerow([fila[columna] for columna in columnas])
+
+
+def _filas_ndjson(filas):
+    for fila in filas:
+        yield json.dumps(fila, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+@login_required
+@require_http_methods(["GET"])
+def exportar(request, recurso):
+    """
+    Exporta intentos o trabajos de Pólya como CSV (por defecto) o NDJSON
+    (?formato=ndjson). Las filas se envían a medida que se leen del cursor,
+    así que la descarga empieza de inmediato y la memoria no crece con el
+    tamaño del resultado. Filtros: usuario, mision/biblioteca, desde, hasta
+    (fechas AAAA-MM-DD, ambas incluidas).
+    """
+    try:
+        es_profesor = getattr(request.user.rol, 'tipo', '') in ('Profesor', 'Administrador')
+    except Exception:
+        es_profesor = False
+    if not es_profesor:
+        return JsonResponse({'status': 'forbidden', 'message': 'Solo profesores'}, status=403)
+
+    if recurso not in EXPORTACIONES:
+        return JsonResponse({'status': 'error', 'message': 'Recurso no válido'}, status=404)
+    modelo, columnas, campo_fecha, filtros = EXPORTACIONES[recurso]
+
+    formato = request.GET.get('formato', 'csv')
+    if formato not in ('csv', 'ndjson'):
+        return JsonResponse({'status': 'error', 'message': 'Formato no válido'}, status=400)
+
+    qs = modelo.objects.order_by('pk')
+    try:
+        for parametro, campo in filtros.items():
+            if request.GET.get(parametro):
+                qs = qs.filter(**{campo: int(request.GET[parametro])})
+        for parametro, lookup in (('desde', 'gte'), ('hasta', 'lte')):
+            if request.GET.get(parametro):
+                fecha = parse_date(request.GET[parametro])
+                if fecha is None:
+                    raise ValueError(parametro)
+                qs = qs.filter(**{f'{campo_fecha}__date__{lookup}': fecha})
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Parámetros inválidos'}, status=400)
+
+    filas = qs.values(*columnas).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    if formato == 'csv':
+        response = StreamingHttpResponse(_filas_csv(columnas, filas), content_type='text/csv; charset=utf-8')
+    else:
+        response = StreamingHttpResponse(_filas_ndjson(filas), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{recurso}.{formato}"'
+    return response
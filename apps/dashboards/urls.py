@@ -1,6 +1,14 @@
 from django.urls import path
-from .views import DashboardsView, MisionesView, MapaProgresoView, OpcionesAprendizajeView,ReporteEstudiantesView
-from .user_views import GestionUsuariosView, editar_usuario, eliminar_usuario
+from .views import (
+    DashboardsView,
+    MisionesView,
+    MapaProgresoView,
+    OpcionesAprendizajeView,
+    ReporteEstudiantesView,
+    api_intentos_estudiantes,
+)
+from .user_views import GestionUsuariosView, editar_usuario, eliminar_usuario, importar_usuarios
+from .export_views import exportar
 from ..biblioteca.views import GestionBibliotecaView, actualizar_contenido, eliminar_contenido
 
 urlpatterns = [
@@ -24,6 +32,11 @@
         eliminar_usuario,
         name="eliminar_usuario",
     ),
+    path(
+        "gestion-usuarios/importar/",
+        importar_usuarios,
+        name="importar_usuarios",
+    ),
     path(
         "gestion-biblioteca/",
         GestionBibliotecaView.as_view(),
@@ -59,4 +72,14 @@
         ReporteEstudiantesView.as_view(),
         name="reporte_estudiantes",
     ),
+    path(
+        "reporte-estudiantes/intentos/",
+        api_intentos_estudiantes,
+        name="api_intentos_estudiantes",
+    ),
+    path(
+        "exportar/<str:recurso>/",
+        exportar,
+        name="exportar",
+    ),
 ]
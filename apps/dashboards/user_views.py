@@ -1,11 +1,26 @@
 from django.views.generic import TemplateView
 from django.views.decorators.http import require_http_methods
+from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.db.models import Q
+from django.core.paginator import Paginator
 from web_project import TemplateLayout
-from apps.authentication.models import Usuarios, Rol
+from web_project.catalogos import obtener_catalogo
+from apps.authentication.models import Usuarios
+from apps.authentication.importacion import (
+    MAX_BYTES_SUBIDA, MAX_FILAS_SUBIDA, formato_de, importar_usuarios as importar, leer_usuarios,
+)
 from django.views.decorators.csrf import csrf_exempt
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows per page in the users table
+USUARIOS_POR_PAGINA = 25
+
+# Largest value of a SQL Server INT column; larger numbers cannot be a user id
+MAX_USUARIO_ID = 2147483647
 
 
 class GestionUsuariosView(TemplateView):
@@ -15,19 +30,20 @@ def get_context_data(self, **kwargs):
         context = TemplateLayout.init(self, super().get_context_data(**kwargs))
         
         # Get search parameters
-        search_query = self.request.GET.get('buscar', '')
+        search_query = self.request.GET.get('buscar', '').strip()
         rol_filter = self.request.GET.get('rol', '')
         estado_filter = self.request.GET.get('estado')
         
-        # Get all users with role information
-        usuarios = Usuarios.objects.select_related('rol').all()
-        
-        # Apply filters
+        # Only the columns shown in the table
+        usuarios = Usuarios.objects.values('usuario_id', 'nombre_usuario', 'rol_id', 'estado')
+
+        # Apply filters. The search is a prefix match on nombre_usuario, which can
+        # use its unique index; a number also matches that exact user id.
         if search_query:
-            usuarios = usuarios.filter(
-                Q(nombre_usuario__icontains=search_query) |
-                Q(usuario_id__icontains=search_query)
-            )
+            filtro = Q(nombre_usuario__startswith=search_query)
+            if search_query.isdigit() and int(search_query) <= MAX_USUARIO_ID:
+                filtro |= Q(usuario_id=int(search_query))
+            usuarios = usuarios.filter(filtro)
             
         if rol_filter:
             usuarios = usuarios.filter(rol_id=rol_filter)
@@ -36,24 +52,31 @@ def get_context_data(self, **kwargs):
         if estado_filter:
             usuarios = usuarios.filter(estado=estado_filter == '1')
         
-        # Get all roles for the filter
-        roles = Rol.objects.all()
-        
-        # Prepare user data with role information
-        usuarios_data = []
-        for usuario in usuarios:
-            usuarios_data.append({
-                'id': usuario.usuario_id,
-                'username': usuario.nombre_usuario,
-                'rol': usuario.rol.tipo if usuario.rol else 'Sin rol',
-                'rol_id': usuario.rol_id,
-                'estado': usuario.estado
-            })
+        # Get all roles for the filter (cached catalog)
+        roles = obtener_catalogo('roles')
+        nombres_rol = {rol['id']: rol['tipo'] for rol in roles}
+        
+        paginator = Paginator(usuarios.order_by('-usuario_id'), USUARIOS_POR_PAGINA)
+        page_obj = paginator.get_page(self.request.GET.get('page'))
+        
+        # Prepare user data with role information (current page only)
+        usuarios_data = [
+            {
+                'id': fila['usuario_id'],
+                'username': fila['nombre_usuario'],
+                'rol': nombres_rol.get(fila['rol_id'], 'Sin rol'),
+                'rol_id': fila['rol_id'],
+                'estado': fila['estado'],
+            }
+            for fila in page_obj.object_list
+        ]
         
         # Add data to context
         context.update({
             'usuarios': usuarios_data,
-            'roles': [{'rol_id': rol.id, 'nombre': rol.tipo} for rol in roles],
+            'page_obj': page_obj,
+            'max_filas_importacion': MAX_FILAS_SUBIDA,
+            'roles': [{'rol_id': rol['id'], 'nombre': rol['tipo']} for rol in roles],
             'search_query': search_query,
             'selected_rol': rol_filter,
             'selected_estado': estado_filter if estado_filter is not None else ''
@@ -114,3 +137,50 @@ def eliminar_usuario(request):
             
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+@login_required
+@require_http_methods(["POST"])
+def importar_usuarios(request):
+    """
+    Alta masiva desde un CSV o JSON subido en el campo `archivo`. Devuelve
+    cuántos usuarios se crearon y los errores por fila.
+    """
+    if getattr(request.user.rol, 'tipo', '') != 'Administrador':
+        return JsonResponse({'success': False, 'error': 'Solo administradores'}, status=403)
+
+    archivo = request.FILES.get('archivo')
+    if archivo is None:
+        return JsonResponse({'success': False, 'error': 'No se recibió ningún archivo'}, status=400)
+    formato = formato_de(archivo.name)
+    if formato is None:
+        return JsonResponse({'success': False, 'error': 'El archivo debe ser .csv o .json'}, status=400)
+
+    if archivo.size > MAX_BYTES_SUBIDA:
+        return JsonResponse({
+            'success': False,
+            'error': 'El archivo es demasiado grande; para importaciones grandes usa el comando importar_usuarios',
+        }, status=400)
+
+    try:
+        filas = leer_usuarios(archivo.read(), formato)
+    except (ValueError, UnicodeDecodeError) as e:
+        return JsonResponse({'success': False, 'error': f'No se pudo leer el archivo: {e}'}, status=400)
+    if len(filas) > MAX_FILAS_SUBIDA:
+        return JsonResponse({
+            'success': False,
+            'error': f'Máximo {MAX_FILAS_SUBIDA} usuarios por archivo; para más usa el comando importar_usuarios',
+        }, status=400)
+
+    try:
+        # Sin pool de procesos dentro de la petición; el comando sí hashea en paralelo
+        resultado = importar(filas, workers=1)
+    except Exception:
+        logger.error("Error al importar usuarios", exc_info=True)
+        return JsonResponse({'success': False, 'error': 'Error interno del servidor'}, status=500)
+
+    return JsonResponse({
+        'success': True,
+        'creados': resultado.creados,
+        'errores': [{'fila': numero, 'mensaje': mensaje} for numero, mensaje in resultado.errores],
+    })
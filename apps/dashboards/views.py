@@ -1,18 +1,32 @@
+import base64
+import binascii
+from datetime import datetime
 from django.views.generic import TemplateView, ListView, View
 from django.http import JsonResponse
-from django.db.models import Q
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_http_methods
+from django.core.paginator import Paginator
+from django.db.models import Q, F
+from django.db.models.functions import Coalesce
 from django.shortcuts import render
 from web_project import TemplateLayout
 from apps.authentication.models import Usuarios, Rol
-from apps.misiones.models import Mision, IntentoMision
-from apps.misiones.models import Habilidad
-from apps.biblioteca.models import Biblioteca, Biblioteca_Contenido
+from apps.misiones.models import IntentoMision
+from .estadisticas import estadisticas_dashboard
+from web_project.catalogos import obtener_catalogo
+from apps.misiones.snapshot import obtener_snapshot
 """
 This file is a view controller for multiple pages as a module.
 Here you can override the page view layout.
 Refer to dashboards/urls.py file for more pages.
 """
 
+# Mission status shown on the progress map, from highest to lowest priority
+PRIORIDAD_ESTADOS = ('completado', 'en_progreso', 'rechazado')
+
+# Student cards per page in the students report
+ESTUDIANTES_POR_PAGINA = 20
+
 
 class DashboardsView(TemplateView):
     def get_template_names(self):
@@ -38,107 +52,9 @@ def get_context_data(self, **kwargs):
         # A function to init the global layout. It is defined in web_project/__init__.py file
         context = TemplateLayout.init(self, super().get_context_data(**kwargs))
         
-        # Obtener el usuario actual
-        user = self.request.user
-        
-        # Obtener estadísticas de misiones
-        from django.db.models import Count, Q, F, ExpressionWrapper, FloatField
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        # Fechas para el cálculo semanal
-        hoy = timezone.now().date()
-        inicio_semana = hoy - timedelta(days=hoy.weekday())
-        fin_semana = inicio_semana + timedelta(days=6)
-        semana_pasada_inicio = inicio_semana - timedelta(weeks=1)
-        semana_pasada_fin = fin_semana - timedelta(weeks=1)
-        
-        # Obtener todas las misiones
-        misiones = Mision.objects.all()
-        
-        # Obtener intentos del usuario
-        intentos_usuario = IntentoMision.objects.filter(usuario=user)
-        
-        # Calcular estadísticas generales
-        total_misiones = misiones.count()
-        misiones_completadas = intentos_usuario.filter(estado='completado').values('mision').distinct().count()
-        misiones_en_progreso = intentos_usuario.filter(estado='en_progreso').values('mision').distinct().count()
-        misiones_pendientes = max(total_misiones - misiones_completadas - misiones_en_progreso, 0)
-        total_habilidades = Habilidad.objects.count()
-        
-        # Calcular tasa de éxito (éxitos / total de intentos)
-        total_intentos = intentos_usuario.count()
-        exitos = intentos_usuario.filter(estado='completado').count()
-        tasa_exito = round((exitos / total_intentos * 100), 1) if total_intentos > 0 else 0
-
-        # Calcular porcentajes de misiones por estado
-        if total_misiones > 0:
-            porcentaje_completadas = round((misiones_completadas / total_misiones * 100), 1)
-            porcentaje_en_progreso = round((misiones_en_progreso / total_misiones * 100), 1)
-            porcentaje_pendientes = round((misiones_pendientes / total_misiones * 100), 1)
-        else:
-            porcentaje_completadas = 0
-            porcentaje_en_progreso = 0
-            porcentaje_pendientes = 0
-        
-        # Calcular progreso semanal
-        misiones_semana_actual = intentos_usuario.filter(
-            estado='completado',
-            fecha_intento__date__range=[inicio_semana, fin_semana]
-        ).count()
-        
-        misiones_semana_anterior = intentos_usuario.filter(
-            estado='completado',
-            fecha_intento__date__range=[semana_pasada_inicio, semana_pasada_fin]
-        ).count()
-        
-        # Calcular tendencia
-        if misiones_semana_anterior > 0:
-            diferencia = misiones_semana_actual - misiones_semana_anterior
-            misiones_tendencia_porcentaje = abs(round((diferencia / misiones_semana_anterior) * 100))
-            misiones_tendencia_texto = 'aumento' if diferencia >= 0 else 'disminución'
-            misiones_tendencia_clase = 'success' if diferencia >= 0 else 'danger'
-        else:
-            misiones_tendencia_porcentaje = 0
-            misiones_tendencia_texto = 'sin cambios'
-            misiones_tendencia_clase = 'secondary'
-        
-        # Obtener todas las habilidades y verificar si el usuario las tiene
-        from apps.misiones.models import ProgresoHabilidad
-        
-        # Obtener todas las habilidades con el progreso del usuario
-        habilidades = []
-        for habilidad in Habilidad.objects.all():
-            progreso = ProgresoHabilidad.objects.filter(
-                usuario=user,
-                habilidad=habilidad
-            ).first()
-            
-            habilidades.append({
-                'nombre': habilidad.nombre,
-                'tiene_habilidad': progreso is not None and progreso.porcentaje_avance > 0,
-                'porcentaje_avance': progreso.porcentaje_avance if progreso else 0
-            })
-        
-        # Agregar datos al contexto
-        context.update({
-            'misiones_totales': total_misiones,
-            'misiones_completadas': misiones_completadas,
-            'misiones_en_progreso': misiones_en_progreso,
-            'misiones_pendientes': misiones_pendientes,
-            'total_habilidades': total_habilidades,
-            'tasa_exito': tasa_exito,
-            'porcentaje_completado': round((misiones_completadas / total_misiones * 100), 1) if total_misiones > 0 else 0,
-            'porcentaje_completadas': porcentaje_completadas,
-            'porcentaje_en_progreso': porcentaje_en_progreso,
-            'porcentaje_pendientes': porcentaje_pendientes,
-            'misiones_semana_actual': misiones_semana_actual,
-            'misiones_semana_anterior': misiones_semana_anterior,
-            'misiones_tendencia_porcentaje': misiones_tendencia_porcentaje,
-            'misiones_tendencia_texto': misiones_tendencia_texto,
-            'misiones_tendencia_clase': misiones_tendencia_clase,
-            'habilidades_usuario': habilidades,
-        })
+        # Las estadísticas solo se muestran en el dashboard del estudiante
+        if 'dashboard_student.html' in (self.get_template_names() or []):
+            context['estadisticas'] = estadisticas_dashboard(self.request.user)
         
         return context
 
@@ -161,43 +77,35 @@ def get_context_data(self, **kwargs):
         # Get the logged-in user
         user = self.request.user
         
-        # Get all missions with their attempts
-        misiones = Mision.objects.prefetch_related(
-            'intentomision_set'
-        ).all().order_by('fecha_creacion')
+        # Get all missions (cached catalog) and this user's attempts from the
+        # per-student snapshot, newest first and grouped by mission
+        misiones = obtener_catalogo('misiones')
+        snapshot = obtener_snapshot(user)
         
         # Calculate progress
-        total_misiones = misiones.count()
+        total_misiones = len(misiones)
         misiones_completadas = 0
-        misiones_con_estado = []
         
         for mision in misiones:
-            # Get all attempts for this mission and user
-            intentos = mision.intentomision_set.filter(usuario=user).order_by('-fecha_intento')
-            ultimo_intento = intentos.first() if intentos.exists() else None
-            
-            # Determine mission status
-            if intentos.filter(estado='completado').exists():
-                estado = 'completado'
+            # Resolve status and last attempt in a single pass over the user's attempts
+            estados = snapshot.estados(mision['mision_id'])
+            estado = next(
+                (candidato for candidato in PRIORIDAD_ESTADOS if candidato in estados),
+                'no_iniciada',
+            )
+            if estado == 'completado':
                 misiones_completadas += 1
-            elif intentos.filter(estado='en_progreso').exists():
-                estado = 'en_progreso'
-            elif intentos.filter(estado='rechazado').exists():
-                estado = 'rechazado'
-            else:
-                estado = 'no_iniciada'
             
-            # Add status to mission object
-            mision.estado = estado
-            mision.ultimo_intento = ultimo_intento
-            misiones_con_estado.append(mision)
+            # Add status to mission row
+            mision['estado'] = estado
+            mision['ultimo_intento'] = snapshot.ultimo_intento(mision['mision_id'])
         
         # Calculate overall progress
         porcentaje_total = int((misiones_completadas / total_misiones * 100)) if total_misiones > 0 else 0
         
         # Add data to context
         context.update({
-            'misiones': misiones_con_estado,
+            'misiones': misiones,
             'porcentaje_total': porcentaje_total,
             'total_misiones': total_misiones,
             'misiones_completadas': misiones_completadas,
@@ -214,23 +122,17 @@ def get_context_data(self, **kwargs):
         
         context = TemplateLayout.init(self, super().get_context_data(**kwargs))
         
-        # Get all active biblioteca items
-        contenidos = Biblioteca.objects.filter(activo=True).order_by('tipo', 'titulo')
-        contenidos_con_detalle = (
-            contenidos
-            .filter(tipo='Contenido')
-            .select_related('detalle_contenido')
-        )
+        # Get all active biblioteca items (cached catalog, with their detail)
+        contenidos = obtener_catalogo('biblioteca')
         # Group by type
         contenidos_por_tipo = {
-            'Contenido': contenidos_con_detalle,
-            'Juego': contenidos.filter(tipo='Juego'),
-            'Practica': contenidos.filter(tipo='Practica')
+            tipo: [contenido for contenido in contenidos if contenido['tipo'] == tipo]
+            for tipo in ('Contenido', 'Juego', 'Practica')
         }
         
         context.update({
             'contenidos_por_tipo': contenidos_por_tipo, 
-            'total_contenidos': contenidos.count()
+            'total_contenidos': len(contenidos)
         })
         
         return context
@@ -242,18 +144,17 @@ class ReporteEstudiantesView(TemplateView):
     def get_context_data(self, **kwargs):
         context = TemplateLayout.init(self, super().get_context_data(**kwargs))
         
-        # Get all active students with related data
+        # Get search parameters
+        query = self.request.GET.get('q', '')
+        
+        # One annotated query over the active students. The counters come from
+        # the materialized Estadistica_Estudiante row (LEFT JOIN) and the skill
+        # progress from a joined projection, so no per-student queries are run.
         estudiantes = Usuarios.objects.filter(
             rol__tipo='Estudiante', 
             estado=True
-        ).select_related('rol').prefetch_related(
-            'intentomision_set',
-            'progresohabilidad'
         )
         
-        # Get search parameters
-        query = self.request.GET.get('q', '')
-        
         # Apply filters
         if query:
             estudiantes = estudiantes.filter(
@@ -261,49 +162,151 @@ def get_context_data(self, **kwargs):
                 Q(usuario_id__icontains=query)
             )
         
+        estudiantes = estudiantes.annotate(
+            misiones_completadas=Coalesce(F('estadistica__intentos_completados'), 0),
+            total_misiones=Coalesce(F('estadistica__misiones_intentadas'), 0),
+            ultima_actividad=F('estadistica__ultima_actividad'),
+            habilidad_nombre=F('progresohabilidad__habilidad__nombre'),
+            habilidad_porcentaje=F('progresohabilidad__porcentaje_avance'),
+        ).values(
+            'usuario_id',
+            'nombre_usuario',
+            'misiones_completadas',
+            'total_misiones',
+            'ultima_actividad',
+            'habilidad_nombre',
+            'habilidad_porcentaje',
+        ).order_by('nombre_usuario', 'usuario_id')
+        
+        paginator = Paginator(estudiantes, ESTUDIANTES_POR_PAGINA)
+        page_obj = paginator.get_page(self.request.GET.get('page'))
+        
         estudiantes_data = []
-        for estudiante in estudiantes:
-            intentos = estudiante.intentomision_set.all()
-            
-            misiones_completadas = intentos.filter(estado='completado').count()
+        for fila in page_obj.object_list.iterator(chunk_size=ESTUDIANTES_POR_PAGINA):
+            misiones_completadas = fila['misiones_completadas']
             
-            total_misiones = intentos.values('mision').distinct().count()
+            total_misiones = fila['total_misiones']
             
             progreso = (misiones_completadas / total_misiones * 100) if total_misiones > 0 else 0
             
             promedio = misiones_completadas / total_misiones * 10 if total_misiones > 0 else 0
             
-            try:
-                progreso_habilidad = getattr(estudiante, 'progresohabilidad', None)
-
-                if progreso_habilidad is not None:
-                    habilidades_data = [{
-                        'nombre': progreso_habilidad.habilidad.nombre,
-                        'porcentaje': progreso_habilidad.porcentaje_avance
-                    }]
-                else:
-                    habilidades_data = []
-
-            except ProgresoHabilidad.DoesNotExist:
+            if fila['habilidad_nombre'] is not None:
+                habilidades_data = [{
+                    'nombre': fila['habilidad_nombre'],
+                    'porcentaje': fila['habilidad_porcentaje']
+                }]
+            else:
                 habilidades_data = []
             
             estudiantes_data.append({
-                'estudiante': estudiante,
+                'estudiante': {
+                    'usuario_id': fila['usuario_id'],
+                    'nombre_usuario': fila['nombre_usuario'],
+                },
                 'misiones_completadas': misiones_completadas,
                 'total_misiones': total_misiones,
                 'progreso': round(progreso, 1),
                 'promedio': round(promedio, 1),
-                'ultima_actividad': intentos.order_by('-fecha_intento').first(),
+                'ultima_actividad': fila['ultima_actividad'],
                 'habilidades': habilidades_data
             })
         
         context['estudiantes_data'] = estudiantes_data
+        context['page_obj'] = page_obj
         context['query'] = query
         
-        # Get all mission attempts for the table
-        intentos_estudiantes = IntentoMision.objects.select_related(
-            'usuario', 'mision'
-        ).order_by('-fecha_intento')
-        context['intentos_estudiantes'] = intentos_estudiantes
+        # The attempts table is loaded page by page from api_intentos_estudiantes;
+        # its student filter lists every active student, not only this page
+        context['estudiantes_filtro'] = Usuarios.objects.filter(
+            rol__tipo='Estudiante',
+            estado=True
+        ).order_by('nombre_usuario').values('usuario_id', 'nombre_usuario')
+        context['misiones_filtro'] = sorted(
+            ({'mision_id': m['mision_id'], 'titulo': m['titulo']} for m in obtener_catalogo('misiones')),
+            key=lambda m: m['titulo'],
+        )
+        context['estados_intento'] = IntentoMision.ESTADO_CHOICES
         
-        return context
\ No newline at end of file
+        return context
+
+
+INTENTOS_POR_PAGINA = 50
+INTENTOS_POR_PAGINA_MAX = 200
+
+
+def _codificar_cursor(fecha_intento, intento_id):
+    valor = f"{fecha_intento.isoformat()}|{intento_id}"
+    return base64.urlsafe_b64encode(valor.encode()).decode()
+
+
+def _decodificar_cursor(cursor):
+    fecha, intento_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(fecha), int(intento_id)
+
+
+@login_required
+@require_http_methods(["GET"])
+def api_intentos_estudiantes(request):
+    """
+    Intentos de misión paginados por keyset sobre (fecha_intento, intento_id),
+    del más reciente al más antiguo. Filtros opcionales: usuario, mision, estado.
+    La respuesta incluye `siguiente` con el cursor de la próxima página o null.
+    Solo para profesores y administradores, igual que la exportación.
+    """
+    try:
+        es_profesor = getattr(request.user.rol, 'tipo', '') in ('Profesor', 'Administrador')
+    except Exception:
+        es_profesor = False
+    if not es_profesor:
+        return JsonResponse({'status': 'forbidden', 'message': 'Solo profesores'}, status=403)
+
+    try:
+        limite = min(max(int(request.GET.get('limite', INTENTOS_POR_PAGINA)), 1), INTENTOS_POR_PAGINA_MAX)
+        intentos = IntentoMision.objects.order_by('-fecha_intento', '-intento_id')
+
+        if request.GET.get('usuario'):
+            intentos = intentos.filter(usuario_id=int(request.GET['usuario']))
+        if request.GET.get('mision'):
+            intentos = intentos.filter(mision_id=int(request.GET['mision']))
+        if request.GET.get('estado'):
+            intentos = intentos.filter(estado=request.GET['estado'])
+
+        cursor = request.GET.get('cursor')
+        if cursor:
+            fecha, intento_id = _decodificar_cursor(cursor)
+            intentos = intentos.filter(
+                Q(fecha_intento__lt=fecha) | Q(fecha_intento=fecha, intento_id__lt=intento_id)
+            )
+    except (TypeError, ValueError, binascii.Error):
+        return JsonResponse({'status': 'error', 'message': 'Parámetros inválidos'}, status=400)
+
+    filas = list(
+        intentos.values(
+            'intento_id',
+            'estado',
+            'fecha_intento',
+            'usuario_id',
+            'usuario__nombre_usuario',
+            'mision_id',
+            'mision__titulo',
+        )[:limite + 1]
+    )
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = _codificar_cursor(filas[-1]['fecha_intento'], filas[-1]['intento_id'])
+
+    estados = dict(IntentoMision.ESTADO_CHOICES)
+    resultados = [{
+        'intento_id': fila['intento_id'],
+        'estado': fila['estado'],
+        'estado_display': estados.get(fila['estado'], fila['estado']),
+        'fecha_intento': fila['fecha_intento'].isoformat() if fila['fecha_intento'] else None,
+        'usuario_id': fila['usuario_id'],
+        'usuario': fila['usuario__nombre_usuario'],
+        'mision_id': fila['mision_id'],
+        'mision': fila['mision__titulo'],
+    } for fila in filas]
+
+    return JsonResponse({'status': 'success', 'resultados': resultados, 'siguiente': siguiente})
\ No newline at end of file
@@ -0,0 +1,47 @@
+import contextlib
+import io
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from web_project import TemplateLayout
+from web_project.template_helpers.theme import TemplateHelper
+
+
+def _contexto_login():
+    # Lo mismo que apps.authentication.views._build_login_context
+    context = TemplateLayout.init(None, {})
+    context.update({"layout_path": TemplateHelper.set_layout("layout_blank.html", context)})
+    return context
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el coste por llamada de TemplateLayout.init (layout vertical) y "
+        "del contexto de la página de login (layout blank), y cuántos bytes "
+        "escriben en stdout. No usa la base de datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--llamadas',
+            type=int,
+            default=20000,
+            help='Llamadas por medición (por defecto 20000).',
+        )
+
+    def handle(self, *args, **options):
+        llamadas = options['llamadas']
+        salida = io.StringIO()
+        with contextlib.redirect_stdout(salida):
+            # La primera llamada resuelve e importa los bootstrap de cada layout
+            TemplateLayout.init(None, {})
+            _contexto_login()
+            inicial = len(salida.getvalue())
+            tiempo_init = timeit.timeit(lambda: TemplateLayout.init(None, {}), number=llamadas)
+            tiempo_login = timeit.timeit(_contexto_login, number=llamadas)
+        bytes_por_llamada = (len(salida.getvalue()) - inicial) / (2 * llamadas)
+
+        self.stdout.write(f'TemplateLayout.init:  {tiempo_init / llamadas * 1e6:.1f} us por llamada')
+        self.stdout.write(f'contexto de login:    {tiempo_login / llamadas * 1e6:.1f} us por llamada')
+        self.stdout.write(f'stdout:               {bytes_por_llamada:.0f} bytes por llamada')
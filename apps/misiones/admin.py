@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Habilidad, Mision, IntentoMision, ProgresoHabilidad
+from .models import Habilidad, Mision, IntentoMision, ProgresoHabilidad, EstadisticaEstudiante
 
 @admin.register(Habilidad)
 class HabilidadAdmin(admin.ModelAdmin):
@@ -25,3 +25,8 @@ class ProgresoHabilidadAdmin(admin.ModelAdmin):
     list_display = ('usuario', 'habilidad', 'porcentaje_avance', 'ultima_actualizacion')
     list_filter = ('habilidad', 'ultima_actualizacion')
     search_fields = ('usuario__username', 'habilidad__nombre')
+
+@admin.register(EstadisticaEstudiante)
+class EstadisticaEstudianteAdmin(admin.ModelAdmin):
+    list_display = ('usuario', 'misiones_completadas', 'misiones_en_progreso', 'total_intentos', 'ultima_actividad')
+    search_fields = ('usuario__nombre_usuario',)
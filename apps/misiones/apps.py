@@ -5,3 +5,6 @@ class MisionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.misiones'
     verbose_name = 'Gestión de Misiones'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,108 @@
+from decimal import Decimal, DecimalException
+
+from django.db import transaction
+
+from .estadisticas import recalcular_estadisticas
+from .models import IntentoMision, Mision
+
+# Estados de un intento que aún espera calificación
+ESTADOS_PENDIENTES = ('en_progreso', 'en_revision')
+
+# Filas por lote; por debajo del límite de 2100 parámetros de SQL Server
+LOTE_CALIFICACION = 2000
+
+# Exponente máximo de una respuesta numérica. Las soluciones tienen como mucho
+# 50 caracteres; "1e999999" no se expande a un millón de dígitos y se compara
+# como texto
+MAX_EXPONENTE_RESPUESTA = 50
+
+
+def normalizar_respuesta(valor):
+    """
+    Forma canónica de una respuesta y si es numérica. Se ignoran los espacios
+    y las mayúsculas; los números aceptan coma decimal y se comparan por valor
+    ("007,50" y "7.5" son la misma respuesta).
+    """
+    texto = ''.join(str(valor or '').split()).lower()
+    try:
+        numero = Decimal(texto.replace(',', '.'))
+        if not numero.is_finite():
+            return texto, False
+        if numero == 0:
+            return '0', True
+        if abs(numero.adjusted()) > MAX_EXPONENTE_RESPUESTA:
+            return texto, False
+        return format(numero.normalize(), 'f'), True
+    except DecimalException:
+        return texto, False
+
+
+def respuestas_mision(solucion_correcta, *alternativas):
+    """Solución correcta normalizada y conjunto de alternativas incorrectas."""
+    correcta = normalizar_respuesta(solucion_correcta)[0]
+    incorrectas = {normalizar_respuesta(a)[0] for a in alternativas} - {correcta, ''}
+    return correcta, frozenset(incorrectas)
+
+
+def calificar_respuesta(solucion_propuesta, correcta, incorrectas):
+    """
+    'completado' si la respuesta coincide con la solución, 'rechazado' si es
+    una alternativa incorrecta o un número distinto de una solución numérica,
+    y None si es ambigua y debe revisarla el profesor.
+    """
+    propuesta, es_numero = normalizar_respuesta(solucion_propuesta)
+    if not propuesta or not correcta:
+        return None
+    if propuesta == correcta:
+        return 'completado'
+    if propuesta in incorrectas:
+        return 'rechazado'
+    if es_numero and normalizar_respuesta(correcta)[1]:
+        return 'rechazado'
+    return None
+
+
+def calificar_pendientes(intentos=None, batch_size=LOTE_CALIFICACION, dry_run=False):
+    """
+    Califica en bloque los intentos pendientes (todos, o los de `intentos`).
+    Las respuestas se comparan en memoria y los cambios se aplican con un
+    UPDATE por estado y lote; después se recalculan las estadísticas de los
+    estudiantes afectados. Devuelve {'completado': n, 'rechazado': n}.
+    """
+    intentos = (intentos if intentos is not None else IntentoMision.objects.all()).filter(
+        estado__in=ESTADOS_PENDIENTES
+    )
+    # Solo las misiones con intentos pendientes; la señal de post_save califica
+    # los intentos de uno en uno
+    misiones = Mision.objects.filter(mision_id__in=intentos.values('mision_id'))
+    claves = {
+        mision_id: respuestas_mision(*respuestas)
+        for mision_id, *respuestas in misiones.values_list(
+            'pk', 'solucion_correcta', 'alternativa1', 'alternativa2', 'alternativa3'
+        )
+    }
+
+    por_estado = {'completado': [], 'rechazado': []}
+    usuarios = set()
+    filas = intentos.order_by().values_list('intento_id', 'usuario_id', 'mision_id', 'solucion_propuesta')
+    for intento_id, usuario_id, mision_id, solucion in filas.iterator(chunk_size=batch_size):
+        clave = claves.get(mision_id)
+        estado = calificar_respuesta(solucion, *clave) if clave else None
+        if estado:
+            por_estado[estado].append(intento_id)
+            usuarios.add(usuario_id)
+
+    if not dry_run:
+        usuarios = list(usuarios)
+        with transaction.atomic():
+            for estado, ids in por_estado.items():
+                for inicio in range(0, len(ids), batch_size):
+                    # El filtro por estado evita pisar una revisión hecha mientras tanto
+                    IntentoMision.objects.filter(
+                        intento_id__in=ids[inicio:inicio + batch_size],
+                        estado__in=ESTADOS_PENDIENTES,
+                    ).update(estado=estado)
+            for inicio in range(0, len(usuarios), batch_size):
+                recalcular_estadisticas(usuarios[inicio:inicio + batch_size])
+
+    return {estado: len(ids) for estado, ids in por_estado.items()}
@@ -0,0 +1,33 @@
+import hashlib
+
+from django.views.decorators.http import condition
+
+
+def condicion_por_version(obtener_version):
+    """
+    GET condicional (ETag / Last-Modified) a partir de una versión barata del
+    recurso. `obtener_version(request, *args, **kwargs)` devuelve una tupla
+    (huella, ultima_modificacion) o None si no hay versión; en ese caso la
+    vista responde con normalidad. La versión se calcula una sola vez por
+    petición, aunque Django pida por separado el ETag y la fecha.
+
+    La huella incluye al usuario porque estas respuestas son por usuario.
+    """
+    def _version(request, *args, **kwargs):
+        versiones = request.__dict__.setdefault('_versiones_condicionales', {})
+        if obtener_version not in versiones:
+            versiones[obtener_version] = obtener_version(request, *args, **kwargs)
+        return versiones[obtener_version]
+
+    def etag(request, *args, **kwargs):
+        version = _version(request, *args, **kwargs)
+        if version is None:
+            return None
+        huella = f"{request.user.pk}:{version[0]}"
+        return hashlib.md5(huella.encode()).hexdigest()
+
+    def ultima_modificacion(request, *args, **kwargs):
+        version = _version(request, *args, **kwargs)
+        return version[1] if version else None
+
+    return condition(etag_func=etag, last_modified_func=ultima_modificacion)
@@ -0,0 +1,171 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import IntentoMision, EstadisticaEstudiante
+from .snapshot import invalidar_snapshots, invalidar_todos_los_snapshots
+from .upsert import bulk_upsert, upsert
+
+CAMPOS_CONTADORES = [
+    'total_intentos',
+    'intentos_completados',
+    'misiones_intentadas',
+    'misiones_completadas',
+    'misiones_en_progreso',
+    'completadas_semana_actual',
+    'completadas_semana_anterior',
+]
+
+
+def inicio_de_semana(hoy=None):
+    """Lunes de la semana de `hoy` (por defecto, la fecha actual)."""
+    hoy = hoy or timezone.now().date()
+    return hoy - timedelta(days=hoy.weekday())
+
+
+def _agregados(hoy):
+    """Expresiones de agregación sobre Intento_Mision que alimentan EstadisticaEstudiante."""
+    inicio_semana = inicio_de_semana(hoy)
+    fin_semana = inicio_semana + timedelta(days=6)
+    semana_pasada_inicio = inicio_semana - timedelta(weeks=1)
+    semana_pasada_fin = fin_semana - timedelta(weeks=1)
+    completado = Q(estado='completado')
+
+    return {
+        'total_intentos': Count('intento_id'),
+        'intentos_completados': Count('intento_id', filter=completado),
+        'misiones_intentadas': Count('mision', distinct=True),
+        'misiones_completadas': Count('mision', distinct=True, filter=completado),
+        'misiones_en_progreso': Count('mision', distinct=True, filter=Q(estado='en_progreso')),
+        'completadas_semana_actual': Count(
+            'intento_id',
+            filter=completado & Q(fecha_intento__date__range=[inicio_semana, fin_semana]),
+        ),
+        'completadas_semana_anterior': Count(
+            'intento_id',
+            filter=completado & Q(fecha_intento__date__range=[semana_pasada_inicio, semana_pasada_fin]),
+        ),
+        'ultima_actividad': Max('fecha_intento'),
+    }
+
+
+def calcular_estadistica(usuario_id, hoy=None):
+    """Valores en vivo de las estadísticas de un usuario, en una sola consulta."""
+    hoy = hoy or timezone.now().date()
+    valores = IntentoMision.objects.filter(usuario_id=usuario_id).order_by().aggregate(**_agregados(hoy))
+    valores['semana_inicio'] = inicio_de_semana(hoy)
+    return valores
+
+
+def recalcular_estadistica(usuario_id):
+    """
+    Recalcula y guarda la fila de estadísticas de un usuario. Debe llamarse en la
+    misma transacción que modifica sus intentos para que la fila nunca quede
+    desfasada respecto a Intento_Mision.
+    """
+    valores = calcular_estadistica(usuario_id)
+    invalidar_snapshots([usuario_id])
+    return upsert(EstadisticaEstudiante, {'usuario_id': usuario_id}, valores)
+
+
+def recalcular_estadisticas(usuario_ids):
+    """
+    Igual que recalcular_estadistica para varios usuarios a la vez: una sola
+    consulta agregada y un upsert por lote. Pensado para las operaciones por
+    lotes sobre intentos de muchos estudiantes.
+    """
+    usuario_ids = list(usuario_ids)
+    if not usuario_ids:
+        return
+    hoy = timezone.now().date()
+    filas = [EstadisticaEstudiante(**fila) for fila in _estadisticas_en_vivo(hoy, usuario_ids)]
+    bulk_upsert(
+        EstadisticaEstudiante,
+        filas,
+        campos_clave=['usuario'],
+        campos_actualizar=CAMPOS_CONTADORES + ['ultima_actividad', 'semana_inicio'],
+    )
+    invalidar_snapshots(usuario_ids)
+
+
+def _ajustar_semana(estadistica, hoy):
+    """Desplaza los contadores semanales si la fila se calculó en una semana anterior."""
+    inicio = inicio_de_semana(hoy)
+    if estadistica.semana_inicio == inicio:
+        return estadistica
+    if estadistica.semana_inicio == inicio - timedelta(weeks=1):
+        estadistica.completadas_semana_anterior = estadistica.completadas_semana_actual
+    else:
+        estadistica.completadas_semana_anterior = 0
+    estadistica.completadas_semana_actual = 0
+    estadistica.semana_inicio = inicio
+    return estadistica
+
+
+def obtener_estadistica(usuario, hoy=None):
+    """
+    Fila de estadísticas del usuario lista para mostrar. Si aún no existe se
+    calcula y guarda en ese momento (p. ej. usuarios anteriores a la tabla).
+    """
+    hoy = hoy or timezone.now().date()
+    if usuario.pk is None:
+        return EstadisticaEstudiante(semana_inicio=inicio_de_semana(hoy))
+    estadistica = EstadisticaEstudiante.objects.filter(usuario_id=usuario.pk).first()
+    if estadistica is None:
+        with transaction.atomic():
+            estadistica = recalcular_estadistica(usuario.pk)
+    return _ajustar_semana(estadistica, hoy)
+
+
+def _estadisticas_en_vivo(hoy, usuario_ids=None):
+    intentos = IntentoMision.objects.order_by()
+    if usuario_ids is not None:
+        intentos = intentos.filter(usuario_id__in=usuario_ids)
+    filas = intentos.values('usuario_id').annotate(**_agregados(hoy))
+    semana_inicio = inicio_de_semana(hoy)
+    for fila in filas:
+        fila['semana_inicio'] = semana_inicio
+        yield fila
+
+
+def reconstruir_estadisticas(batch_size=500):
+    """Vuelve a generar toda la tabla a partir de Intento_Mision. Devuelve el número de filas."""
+    hoy = timezone.now().date()
+    filas = [EstadisticaEstudiante(**fila) for fila in _estadisticas_en_vivo(hoy)]
+    with transaction.atomic():
+        EstadisticaEstudiante.objects.all().delete()
+        EstadisticaEstudiante.objects.bulk_create(filas, batch_size=batch_size)
+        invalidar_todos_los_snapshots()
+    return len(filas)
+
+
+def verificar_estadisticas():
+    """
+    Compara la tabla materializada con los agregados en vivo. Devuelve una lista
+    de (usuario_id, campo, valor_guardado, valor_en_vivo) con las diferencias.
+    """
+    hoy = timezone.now().date()
+    guardadas = {e.usuario_id: _ajustar_semana(e, hoy) for e in EstadisticaEstudiante.objects.all()}
+    diferencias = []
+    vistos = set()
+
+    for fila in _estadisticas_en_vivo(hoy):
+        usuario_id = fila['usuario_id']
+        vistos.add(usuario_id)
+        estadistica = guardadas.get(usuario_id)
+        for campo in CAMPOS_CONTADORES + ['ultima_actividad']:
+            guardado = getattr(estadistica, campo) if estadistica else None
+            if guardado != fila[campo]:
+                diferencias.append((usuario_id, campo, guardado, fila[campo]))
+
+    # Filas con contadores para usuarios que ya no tienen intentos
+    for usuario_id, estadistica in guardadas.items():
+        if usuario_id in vistos:
+            continue
+        for campo in CAMPOS_CONTADORES:
+            if getattr(estadistica, campo):
+                diferencias.append((usuario_id, campo, getattr(estadistica, campo), 0))
+
+    return diferencias
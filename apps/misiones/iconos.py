@@ -0,0 +1,94 @@
+"""
+Iconos guardados como BinaryField (Habilidad.icono, Trofeo.icono_trofeo).
+Cada icono se lee una vez de la base de datos y se guarda en el caché junto
+con su huella, que sirve de ETag fuerte. Con Pillow instalado y
+ICONOS_MINIATURAS_DIR configurado también se generan miniaturas en disco.
+"""
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+
+from web_project.catalogos import CATALOGOS_TIMEOUT, version_tabla
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow es opcional: sin él se sirve el icono original
+    Image = None
+
+# Lados (px) permitidos para las miniaturas; acota los ficheros en disco
+TAMANOS_MINIATURA = (32, 64, 128)
+
+FIRMAS = (
+    (b'\x89PNG', 'image/png'),
+    (b'\xff\xd8', 'image/jpeg'),
+    (b'GIF8', 'image/gif'),
+    (b'<svg', 'image/svg+xml'),
+    (b'<?xml', 'image/svg+xml'),
+)
+
+
+def tipo_contenido(datos):
+    if datos[:4] == b'RIFF' and datos[8:12] == b'WEBP':
+        return 'image/webp'
+    for firma, tipo in FIRMAS:
+        if datos.startswith(firma):
+            return tipo
+    return 'application/octet-stream'
+
+
+def obtener_icono(modelo, campo, pk):
+    """
+    (etag, bytes, tipo de contenido) del icono, o None si la fila no existe o
+    no tiene icono. La clave incluye la versión de la tabla, que cambia al
+    guardar cualquier fila.
+    """
+    clave = f'iconos:{modelo._meta.db_table}:{pk}:{version_tabla(modelo)}'
+    icono = cache.get(clave)
+    if icono is None:
+        datos = modelo.objects.filter(pk=pk).values_list(campo, flat=True).first()
+        # '' marca "sin icono" para no repetir la consulta
+        icono = ''
+        if datos:
+            datos = bytes(datos)
+            icono = (hashlib.sha256(datos).hexdigest(), datos, tipo_contenido(datos))
+        cache.set(clave, icono, timeout=CATALOGOS_TIMEOUT)
+    return icono or None
+
+
+def miniatura(icono, nombre, tamano):
+    """
+    Bytes y tipo de una miniatura PNG de `tamano` px, leída del directorio de
+    miniaturas o generada en él. Devuelve el icono original si no hay Pillow,
+    no hay directorio configurado o la imagen no se puede leer.
+    """
+    etag, datos, tipo = icono
+    directorio = getattr(settings, 'ICONOS_MINIATURAS_DIR', None)
+    if Image is None or not directorio or tipo == 'image/svg+xml':
+        return datos, tipo
+
+    # La huella en el nombre hace que un icono nuevo nunca reutilice una miniatura vieja
+    ruta = os.path.join(directorio, f'{nombre}-{etag[:16]}-{tamano}.png')
+    try:
+        with open(ruta, 'rb') as fichero:
+            return fichero.read(), 'image/png'
+    except FileNotFoundError:
+        pass
+
+    try:
+        imagen = Image.open(io.BytesIO(datos))
+        imagen.thumbnail((tamano, tamano))
+        salida = io.BytesIO()
+        imagen.save(salida, format='PNG')
+    except (OSError, ValueError):
+        return datos, tipo
+    contenido = salida.getvalue()
+
+    os.makedirs(directorio, exist_ok=True)
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with open(temporal, 'wb') as fichero:
+        fichero.write(contenido)
+    os.replace(temporal, ruta)
+    return contenido, 'image/png'
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from apps.misiones.calificador import LOTE_CALIFICACION, calificar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Califica automáticamente los intentos pendientes comparando la solución "
+        "propuesta con la solución correcta de la misión. Las respuestas ambiguas "
+        "quedan pendientes para el profesor."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa de cuántos intentos se calificarían.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=LOTE_CALIFICACION,
+            help=f'Filas por lote (por defecto {LOTE_CALIFICACION}).',
+        )
+
+    def handle(self, *args, **options):
+        totales = calificar_pendientes(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        verbo = 'Se calificarían' if options['dry_run'] else 'Se calificaron'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verbo} {totales['completado']} intentos como completados "
+            f"y {totales['rechazado']} como incorrectos."
+        ))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from apps.misiones.estadisticas import reconstruir_estadisticas
+from apps.misiones.models import IntentoMision
+
+LOTE_BORRADO = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina los intentos duplicados por (usuario, mision) conservando el más "
+        "reciente, como paso previo a crear la restricción UNIQUE en Intento_Mision."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa de cuántos intentos se eliminarían.',
+        )
+
+    def handle(self, *args, **options):
+        # Numera los intentos de cada (usuario, mision) del más reciente al más antiguo
+        numerados = IntentoMision.objects.annotate(
+            posicion=Window(
+                expression=RowNumber(),
+                partition_by=[F('usuario_id'), F('mision_id')],
+                order_by=[F('fecha_intento').desc(nulls_last=True), F('intento_id').desc()],
+            )
+        )
+        duplicados = list(numerados.filter(posicion__gt=1).values_list('intento_id', flat=True))
+
+        if options['dry_run']:
+            self.stdout.write(f"Se eliminarían {len(duplicados)} intentos duplicados.")
+            return
+
+        # Borrado por lotes para no superar el límite de parámetros de SQL Server
+        with transaction.atomic():
+            for inicio in range(0, len(duplicados), LOTE_BORRADO):
+                IntentoMision.objects.filter(
+                    intento_id__in=duplicados[inicio:inicio + LOTE_BORRADO]
+                ).delete()
+            reconstruir_estadisticas()
+
+        self.stdout.write(self.style.SUCCESS(f"Se eliminaron {len(duplicados)} intentos duplicados."))
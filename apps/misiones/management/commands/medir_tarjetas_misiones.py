@@ -0,0 +1,94 @@
+import time
+
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from apps.authentication.models import Rol, Usuarios
+from apps.misiones.views import TIPOS_EN_ORDEN
+
+SIN_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo de render de misiones.html con N tarjetas: el primer "
+        "render (fragmentos de mision_card vacíos) y el mejor de los siguientes "
+        "(fragmentos en caché). Con --sin-cache se usa DummyCache, es decir, "
+        "cada tarjeta se renderiza siempre. No usa la base de datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--misiones',
+            type=int,
+            nargs='+',
+            default=[40, 200, 1000],
+            help='Cantidades de tarjetas a medir (por defecto 40 200 1000).',
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=3,
+            help='Renders repetidos después del primero (por defecto 3).',
+        )
+        parser.add_argument(
+            '--sin-cache',
+            action='store_true',
+            help='Mide sin caché de fragmentos.',
+        )
+
+    def handle(self, *args, **options):
+        if options['sin_cache']:
+            with override_settings(CACHES=SIN_CACHE):
+                self._medir(options)
+        else:
+            self._medir(options)
+
+    def _medir(self, options):
+        usuarios = [
+            Usuarios(usuario_id=1, nombre_usuario='estudiante', rol=Rol(id=1, tipo='Estudiante')),
+            Usuarios(usuario_id=2, nombre_usuario='profesor', rol=Rol(id=2, tipo='Profesor')),
+        ]
+        for cantidad in options['misiones']:
+            misiones = [
+                {
+                    'mision_id': i + 1,
+                    'titulo': f'Misión {i + 1}',
+                    'descripcion': 'Descripción de la misión',
+                    'tipo_operacion': TIPOS_EN_ORDEN[i % len(TIPOS_EN_ORDEN)],
+                    'activa': True,
+                    'estado_actual': 'pendiente',
+                    'bloqueada': False,
+                }
+                for i in range(cantidad)
+            ]
+            for usuario in usuarios:
+                cache.clear()
+                primero, repetido = self._render(misiones, usuario, options['repeticiones'])
+                self.stdout.write(
+                    f'{cantidad} misiones, {usuario.rol.tipo}: '
+                    f'primero {primero * 1000:.0f} ms, repetido {repetido * 1000:.0f} ms'
+                )
+
+    def _render(self, misiones, usuario, repeticiones):
+        request = RequestFactory().get('/misiones/')
+        request.user = usuario
+        request.session = SessionStore()
+        contexto = {
+            'misiones': misiones,
+            'total_misiones': len(misiones),
+            'misiones_por_pagina': len(misiones),
+            'habilidades': [],
+            'request': request,
+            'version_misiones': 1,
+        }
+        tiempos = []
+        for _ in range(repeticiones + 1):
+            inicio = time.perf_counter()
+            render_to_string('dashboards/misiones.html', contexto, request=request)
+            tiempos.append(time.perf_counter() - inicio)
+        return tiempos[0], min(tiempos[1:])
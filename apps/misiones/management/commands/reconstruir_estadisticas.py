@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.misiones.estadisticas import reconstruir_estadisticas, verificar_estadisticas
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye la tabla Estadistica_Estudiante a partir de Intento_Mision "
+        "y la compara con los agregados en vivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-verificar',
+            action='store_true',
+            help='No reconstruye la tabla; solo informa de las diferencias.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Tamaño de lote para bulk_create (por defecto 500).',
+        )
+
+    def handle(self, *args, **options):
+        if not options['solo_verificar']:
+            total = reconstruir_estadisticas(batch_size=options['batch_size'])
+            self.stdout.write(f"Se reconstruyeron {total} filas de estadísticas.")
+
+        diferencias = verificar_estadisticas()
+        for usuario_id, campo, guardado, en_vivo in diferencias:
+            self.stdout.write(
+                f"  usuario {usuario_id}: {campo} guardado={guardado} en_vivo={en_vivo}"
+            )
+        if diferencias:
+            raise CommandError(f"Se encontraron {len(diferencias)} diferencias.")
+
+        self.stdout.write(self.style.SUCCESS("Las estadísticas coinciden con los intentos."))
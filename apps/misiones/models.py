@@ -12,11 +12,27 @@
     ('division', 'División'),
 ]
 
+class DiferirBinariosManager(models.Manager):
+    """
+    Manager que no trae las columnas BinaryField (iconos) en las consultas.
+    Se cargan al acceder al atributo o pidiéndolas con only()/values(); para
+    mostrarlas está el endpoint de iconos (ver misiones/iconos.py).
+    """
+    def get_queryset(self):
+        binarios = [
+            campo.attname for campo in self.model._meta.concrete_fields
+            if isinstance(campo, models.BinaryField)
+        ]
+        return super().get_queryset().defer(*binarios)
+
+
 class Habilidad(models.Model):
     habilidad_id = models.AutoField(primary_key=True)
     nombre = models.CharField(max_length=100)
     icono = models.BinaryField(null=True, blank=True)
 
+    objects = DiferirBinariosManager()
+
     class Meta:
         db_table = 'Habilidad'
         verbose_name_plural = 'Habilidades'
@@ -64,6 +80,11 @@ class Meta:
         db_table = 'Intento_Mision'
         verbose_name_plural = 'Intentos de Misiones'
         ordering = ['-fecha_intento']
+        unique_together = (('usuario', 'mision'),)
+        indexes = [
+            # Paginación por keyset del reporte de intentos
+            models.Index(fields=['-fecha_intento', '-intento_id'], name='intento_fecha_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.usuario.nombre_usuario} - {self.mision.titulo} ({self.estado})"
@@ -145,6 +166,8 @@ class Trofeo(models.Model):
     descripcion = models.TextField(null=True, blank=True)
     icono_trofeo = models.BinaryField(null=True, blank=True)
 
+    objects = DiferirBinariosManager()
+
     class Meta:
         db_table = 'Trofeo'
         verbose_name_plural = 'Trofeos'
@@ -163,4 +186,38 @@ class Meta:
         unique_together = (('trofeo', 'usuario'),)
 
     def __str__(self):
-        return f"{self.usuario.nombre_usuario} - {self.trofeo.nombre_trofeo}"
\ No newline at end of file
+        return f"{self.usuario.nombre_usuario} - {self.trofeo.nombre_trofeo}"
+
+class EstadisticaEstudiante(models.Model):
+    """
+    Resumen desnormalizado de los intentos de un estudiante. Se recalcula en la
+    misma transacción que escribe en Intento_Mision (ver misiones/estadisticas.py)
+    para que los dashboards lean una sola fila en lugar de agregar intentos.
+    """
+    usuario = models.OneToOneField(
+        Usuarios,
+        on_delete=models.CASCADE,
+        db_column='usuario_id',
+        primary_key=True,
+        related_name='estadistica',
+    )
+    total_intentos = models.IntegerField(default=0)
+    intentos_completados = models.IntegerField(default=0)
+    misiones_intentadas = models.IntegerField(default=0)
+    misiones_completadas = models.IntegerField(default=0)
+    misiones_en_progreso = models.IntegerField(default=0)
+
+    # Intentos completados en la semana que empieza en `semana_inicio` y en la anterior
+    semana_inicio = models.DateField(null=True, blank=True)
+    completadas_semana_actual = models.IntegerField(default=0)
+    completadas_semana_anterior = models.IntegerField(default=0)
+
+    ultima_actividad = models.DateTimeField(null=True, blank=True)
+    ultima_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'Estadistica_Estudiante'
+        verbose_name_plural = 'Estadísticas de Estudiantes'
+
+    def __str__(self):
+        return f"Estadística - {self.usuario_id}"
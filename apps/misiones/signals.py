@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.biblioteca.models import Biblioteca_Usuario
+from web_project.catalogos import invalidar_tabla
+
+from .calificador import ESTADOS_PENDIENTES, calificar_pendientes
+from .models import IntentoMision, ProgresoHabilidad, Trofeo
+from .snapshot import invalidar_snapshots
+
+
+@receiver(post_save, sender=IntentoMision)
+def calificar_intento_creado(sender, instance, created, **kwargs):
+    """
+    Califica los intentos creados con el ORM (p. ej. desde el admin). Los
+    endpoints que escriben con upsert no disparan señales y califican antes
+    de guardar.
+    """
+    if created and instance.estado in ESTADOS_PENDIENTES:
+        calificar_pendientes(IntentoMision.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=ProgresoHabilidad)
+@receiver(post_delete, sender=ProgresoHabilidad)
+@receiver(post_save, sender=Biblioteca_Usuario)
+@receiver(post_delete, sender=Biblioteca_Usuario)
+def invalidar_snapshot_usuario(sender, instance, **kwargs):
+    """
+    El progreso por habilidad y los contenidos vistos (marcar_contenido_visto)
+    forman parte de la instantánea del estudiante.
+    """
+    invalidar_snapshots([instance.usuario_id])
+
+
+@receiver(post_save, sender=Trofeo)
+@receiver(post_delete, sender=Trofeo)
+def invalidar_iconos_trofeo(sender, **kwargs):
+    """Trofeo no es un catálogo, pero sus iconos se cachean por versión de tabla."""
+    transaction.on_commit(lambda: invalidar_tabla(Trofeo))
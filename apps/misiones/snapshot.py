@@ -0,0 +1,145 @@
+"""
+Instantánea del estado de un estudiante (intentos por misión, tipos de
+operación desbloqueados, contenidos vistos, progreso de habilidades y fila de
+estadísticas), construida una vez y guardada en el caché bajo una clave
+versionada. Las escrituras que cambian alguno de esos datos incrementan la
+versión del usuario y la siguiente lectura la reconstruye.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.biblioteca.models import Biblioteca_Contenido, Biblioteca_Usuario
+from web_project.catalogos import incrementar_version, obtener_version, version_tabla
+
+from .models import EstadisticaEstudiante, Habilidad, IntentoMision, ProgresoHabilidad
+
+# Segundos que vive una instantánea aunque nadie la invalide
+SNAPSHOT_TIMEOUT = 60 * 60
+
+
+@dataclass
+class StudentSnapshot:
+    usuario_id: int
+    # mision_id -> [(intento_id, estado, fecha_intento)], del más reciente al más antiguo
+    intentos: Dict[int, List[Tuple[int, str, Optional[datetime]]]] = field(default_factory=dict)
+    tipos_desbloqueados: FrozenSet[str] = frozenset()
+    contenidos_vistos: FrozenSet[int] = frozenset()
+    # habilidad_id -> porcentaje_avance
+    progreso_habilidades: Dict[int, int] = field(default_factory=dict)
+    # Campos de EstadisticaEstudiante (contadores, semana_inicio, ultima_actividad)
+    estadistica: Dict[str, Any] = field(default_factory=dict)
+
+    def ultimo_estado(self, mision_id):
+        intentos = self.intentos.get(mision_id)
+        return intentos[0][1] if intentos else None
+
+    def ultimo_intento(self, mision_id):
+        intentos = self.intentos.get(mision_id)
+        if not intentos:
+            return None
+        intento_id, estado, fecha_intento = intentos[0]
+        return {'intento_id': intento_id, 'estado': estado, 'fecha_intento': fecha_intento}
+
+    def estados(self, mision_id):
+        return {estado for _intento_id, estado, _fecha in self.intentos.get(mision_id, ())}
+
+    def bloqueada(self, tipo):
+        return (tipo or '').strip().lower() not in self.tipos_desbloqueados
+
+    def estadistica_estudiante(self, hoy=None):
+        """Fila de estadísticas (sin guardar) a partir de la instantánea, con la semana al día."""
+        from .estadisticas import _ajustar_semana
+
+        hoy = hoy or timezone.now().date()
+        return _ajustar_semana(EstadisticaEstudiante(usuario_id=self.usuario_id, **self.estadistica), hoy)
+
+
+def _clave_version(usuario_id):
+    return f'snapshot:version:{usuario_id}'
+
+
+CLAVE_VERSION_GLOBAL = 'snapshot:version:global'
+
+
+def invalidar_snapshots(usuario_ids):
+    """Invalida la instantánea de cada usuario al confirmarse la transacción en curso."""
+    usuario_ids = list(usuario_ids)
+
+    def _invalidar():
+        for usuario_id in usuario_ids:
+            incrementar_version(_clave_version(usuario_id))
+    transaction.on_commit(_invalidar)
+
+
+def invalidar_todos_los_snapshots():
+    transaction.on_commit(lambda: incrementar_version(CLAVE_VERSION_GLOBAL))
+
+
+def _construir(usuario):
+    # Import diferido: estadisticas invalida las instantáneas al recalcular
+    from .estadisticas import CAMPOS_CONTADORES, obtener_estadistica
+
+    usuario_id = usuario.pk
+
+    intentos = {}
+    filas = (
+        IntentoMision.objects.filter(usuario_id=usuario_id)
+        .order_by('-fecha_intento', '-intento_id')
+        .values_list('mision_id', 'intento_id', 'estado', 'fecha_intento')
+    )
+    for mision_id, intento_id, estado, fecha_intento in filas:
+        intentos.setdefault(mision_id, []).append((intento_id, estado, fecha_intento))
+
+    vistos = set()
+    tipos = set()
+    for biblioteca_id, tipo in (
+        Biblioteca_Usuario.objects.filter(usuario_id=usuario_id, estado=True)
+        .values_list('biblioteca_id', 'biblioteca__detalle_contenido__tipo_operacion')
+    ):
+        vistos.add(biblioteca_id)
+        if tipo:
+            tipos.add(tipo)
+
+    progreso = dict(
+        ProgresoHabilidad.objects.filter(usuario_id=usuario_id).values_list('habilidad_id', 'porcentaje_avance')
+    )
+
+    fila = obtener_estadistica(usuario)
+    estadistica = {campo: getattr(fila, campo) for campo in CAMPOS_CONTADORES + ['semana_inicio', 'ultima_actividad']}
+
+    return StudentSnapshot(
+        usuario_id=usuario_id,
+        intentos=intentos,
+        tipos_desbloqueados=frozenset(tipos),
+        contenidos_vistos=frozenset(vistos),
+        progreso_habilidades=progreso,
+        estadistica=estadistica,
+    )
+
+
+def obtener_snapshot(usuario):
+    """
+    Instantánea del usuario desde el caché, o recién construida si su versión
+    cambió. La clave incluye también las versiones de las tablas de referencia
+    de las que depende (habilidades y contenidos de biblioteca).
+    """
+    usuario_id = usuario.pk
+    if usuario_id is None:
+        return _construir(usuario)
+    clave = 'snapshot:{}:{}:{}:{}:{}'.format(
+        usuario_id,
+        obtener_version(_clave_version(usuario_id)),
+        obtener_version(CLAVE_VERSION_GLOBAL),
+        version_tabla(Habilidad),
+        version_tabla(Biblioteca_Contenido),
+    )
+    snapshot = cache.get(clave)
+    if snapshot is None:
+        snapshot = _construir(usuario)
+        cache.set(clave, snapshot, timeout=SNAPSHOT_TIMEOUT)
+    return snapshot
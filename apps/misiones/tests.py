@@ -0,0 +1,237 @@
+import json
+import threading
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.authentication.models import Rol, Usuarios
+
+from .calificador import calificar_pendientes
+from .models import Habilidad, IntentoMision, Mision
+from .upsert import bulk_upsert, upsert
+from .views import MISIONES_POR_TIPO, TIPOS_EN_ORDEN, _misiones_ordenadas
+
+
+def setUpModule():
+    # Rol, Usuarios y las tablas de biblioteca tienen managed=False y el test
+    # runner no las crea; se crean aquí en la base de datos de pruebas
+    existentes = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for modelo in apps.get_models():
+            if not modelo._meta.managed and modelo._meta.db_table not in existentes:
+                editor.create_model(modelo)
+                existentes.add(modelo._meta.db_table)
+
+
+class MisionesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rol_estudiante = Rol.objects.create(tipo='Estudiante')
+        cls.estudiante = Usuarios.objects.create(
+            nombre_usuario='estudiante', rol=cls.rol_estudiante, contraseña_hash='x'
+        )
+        cls.habilidad = Habilidad.objects.create(nombre='Sumar')
+
+    def setUp(self):
+        # Las invalidaciones del caché van en on_commit, que no se ejecuta
+        # dentro de la transacción de cada prueba
+        cache.clear()
+        self.client.force_login(self.estudiante)
+
+    def crear_misiones(self, cantidad, tipo='suma'):
+        return [
+            Mision.objects.create(
+                habilidad=self.habilidad,
+                titulo=f'{tipo} {i}',
+                tipo_operacion=tipo,
+                solucion_correcta='10',
+                alternativa1='8',
+                alternativa2='9',
+                alternativa3='11',
+            )
+            for i in range(cantidad)
+        ]
+
+
+class GuardarIntentosLoteTests(MisionesTestCase):
+    def test_lote_como_lo_envia_el_cliente(self):
+        # Igual que manejarConfirmarRespuesta en misiones.html: mision_id como
+        # texto (atributo data-mision-id) y estado 'en_revision'
+        correcta, incorrecta, ambigua = self.crear_misiones(3)
+        lote = [
+            {'mision_id': str(correcta.pk), 'solucion': '10', 'estado': 'en_revision'},
+            {'mision_id': str(incorrecta.pk), 'solucion': '8', 'estado': 'en_revision'},
+            {'mision_id': str(ambigua.pk), 'solucion': 'no lo sé', 'estado': 'en_revision'},
+        ]
+
+        respuesta = self.client.post(
+            reverse('misiones:guardar_intentos_lote'), json.dumps(lote), content_type='application/json'
+        )
+
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(datos['guardados'], 3)
+        self.assertEqual(
+            [resultado['estado'] for resultado in datos['resultados']],
+            ['completado', 'rechazado', 'en_revision'],
+        )
+        self.assertEqual(IntentoMision.objects.filter(usuario=self.estudiante).count(), 3)
+
+    def test_estado_desconocido(self):
+        mision, = self.crear_misiones(1)
+        lote = {'intentos': [{'mision_id': mision.pk, 'solucion': '10', 'estado': 'aprobado'}]}
+
+        respuesta = self.client.post(
+            reverse('misiones:guardar_intentos_lote'), json.dumps(lote), content_type='application/json'
+        )
+
+        self.assertEqual(respuesta.json()['resultados'][0]['message'], 'Estado inválido')
+        self.assertFalse(IntentoMision.objects.exists())
+
+
+class RespuestasFueraDeRangoTests(MisionesTestCase):
+    # "1e999999999" desborda Decimal.normalize() y "1e999998" se expandiría a
+    # un millón de dígitos; ambas quedan pendientes de revisión
+    RESPUESTAS = ('1e999999999', '1e999998', '1e-999999999')
+
+    def test_guardar_intento(self):
+        for mision, respuesta in zip(self.crear_misiones(len(self.RESPUESTAS)), self.RESPUESTAS):
+            respuesta_http = self.client.post(
+                reverse('misiones:guardar_intento'),
+                json.dumps({'mision_id': mision.pk, 'solucion': respuesta, 'estado': 'en_revision'}),
+                content_type='application/json',
+            )
+            self.assertEqual(respuesta_http.status_code, 200)
+        self.assertEqual(
+            set(IntentoMision.objects.filter(usuario=self.estudiante).values_list('estado', flat=True)),
+            {'en_revision'},
+        )
+
+    def test_guardar_intentos_lote(self):
+        misiones = self.crear_misiones(len(self.RESPUESTAS))
+        lote = [
+            {'mision_id': mision.pk, 'solucion': respuesta, 'estado': 'en_revision'}
+            for mision, respuesta in zip(misiones, self.RESPUESTAS)
+        ]
+
+        respuesta = self.client.post(
+            reverse('misiones:guardar_intentos_lote'), json.dumps(lote), content_type='application/json'
+        )
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            [resultado['estado'] for resultado in respuesta.json()['resultados']],
+            ['en_revision'] * len(self.RESPUESTAS),
+        )
+
+    def test_calificar_pendientes(self):
+        # Los intentos creados con el ORM se califican en la señal de post_save
+        mision, correcta = self.crear_misiones(2)
+        IntentoMision.objects.create(usuario=self.estudiante, mision=mision, estado='en_progreso',
+                                     solucion_propuesta='1e999999999')
+        intento = IntentoMision.objects.create(usuario=self.estudiante, mision=correcta, estado='en_progreso',
+                                               solucion_propuesta='10')
+
+        self.assertEqual(calificar_pendientes(), {'completado': 0, 'rechazado': 0})
+        intento.refresh_from_db()
+        self.assertEqual(intento.estado, 'completado')
+
+
+class ListaMisionesTests(MisionesTestCase):
+    def abrir_lista(self):
+        respuesta = self.client.get(reverse('misiones:misiones'))
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def crear_intentos(self, misiones):
+        for mision in misiones:
+            IntentoMision.objects.create(usuario=self.estudiante, mision=mision, estado='en_progreso')
+
+    def test_consultas_constantes_al_crecer_las_misiones(self):
+        self.crear_intentos(self.crear_misiones(2))
+        # La primera visita crea la fila de Estadistica_Estudiante
+        self.abrir_lista()
+        cache.clear()
+        with CaptureQueriesContext(connection) as pocas_misiones:
+            self.abrir_lista()
+
+        for tipo in TIPOS_EN_ORDEN:
+            self.crear_intentos(self.crear_misiones(15, tipo))
+        cache.clear()
+        with self.assertNumQueries(len(pocas_misiones)):
+            self.abrir_lista()
+
+    def test_orden_por_tipo_de_operacion(self):
+        sumas = self.crear_misiones(MISIONES_POR_TIPO + 2, 'suma')
+        restas = self.crear_misiones(2, 'resta')
+        otras = self.crear_misiones(1, 'potencia')
+
+        orden = [mision['mision_id'] for mision in _misiones_ordenadas()]
+
+        esperado = sumas[:MISIONES_POR_TIPO] + restas + sumas[MISIONES_POR_TIPO:] + otras
+        self.assertEqual(orden, [mision.pk for mision in esperado])
+
+
+# Necesita varias conexiones a la base de datos de pruebas: se ejecuta con
+# SQL Server (config/settings.py) y SQLite la omite
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class UpsertConcurrenteTests(TransactionTestCase):
+    # Varios hilos, cada uno con su propia conexión, guardan a la vez el
+    # intento del mismo (usuario, misión): en SQL Server por MERGE ... WITH
+    # (HOLDLOCK) y en el resto de motores por INSERT ... ON CONFLICT
+    HILOS = 8
+
+    def setUp(self):
+        rol = Rol.objects.create(tipo='Estudiante')
+        self.estudiante = Usuarios.objects.create(nombre_usuario='estudiante', rol=rol, contraseña_hash='x')
+        habilidad = Habilidad.objects.create(nombre='Sumar')
+        self.mision = Mision.objects.create(habilidad=habilidad, titulo='suma', tipo_operacion='suma')
+
+    def tearDown(self):
+        # El flush de TransactionTestCase no vacía las tablas con managed=False
+        Usuarios.objects.all().delete()
+        Rol.objects.all().delete()
+
+    def guardar_a_la_vez(self, guardar):
+        barrera = threading.Barrier(self.HILOS)
+        errores = []
+
+        def trabajo(numero):
+            try:
+                barrera.wait()
+                with transaction.atomic():
+                    guardar(numero)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajo, args=(numero,)) for numero in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+
+    def test_upsert(self):
+        self.guardar_a_la_vez(lambda numero: upsert(
+            IntentoMision,
+            {'usuario': self.estudiante, 'mision': self.mision},
+            {'estado': 'en_progreso', 'solucion_propuesta': str(numero), 'fecha_intento': timezone.now()},
+        ))
+        self.assertEqual(IntentoMision.objects.filter(usuario=self.estudiante, mision=self.mision).count(), 1)
+
+    def test_bulk_upsert(self):
+        self.guardar_a_la_vez(lambda numero: bulk_upsert(
+            IntentoMision,
+            [IntentoMision(usuario=self.estudiante, mision=self.mision, estado='en_progreso',
+                           solucion_propuesta=str(numero), fecha_intento=timezone.now())],
+            campos_clave=['usuario', 'mision'],
+            campos_actualizar=['estado', 'solucion_propuesta', 'fecha_intento'],
+        ))
+        self.assertEqual(IntentoMision.objects.filter(usuario=self.estudiante, mision=self.mision).count(), 1)
@@ -0,0 +1,96 @@
+from django.db import connections, router
+
+# SQL Server admite como máximo 2100 parámetros por sentencia
+MAX_PARAMETROS_SQLSERVER = 2000
+
+
+def upsert(modelo, claves, valores):
+    """
+    Upsert atómico de una sola fila en una única sentencia. `claves` identifica
+    la fila (p. ej. {'usuario': u, 'mision_id': 3}) y `valores` son los campos a
+    escribir tanto al insertar como al actualizar. Devuelve la instancia con su
+    clave primaria asignada.
+    """
+    objeto = modelo(**claves, **valores)
+    bulk_upsert(
+        modelo,
+        [objeto],
+        campos_clave=[modelo._meta.get_field(nombre).name for nombre in claves],
+        campos_actualizar=[modelo._meta.get_field(nombre).name for nombre in valores],
+    )
+    return objeto
+
+
+def bulk_upsert(modelo, objetos, campos_clave, campos_actualizar, batch_size=500):
+    """
+    Inserta o actualiza `objetos` (instancias sin guardar de `modelo`) en una
+    sola sentencia por lote, usando `campos_clave` para detectar conflictos y
+    sobrescribiendo `campos_actualizar` en las filas existentes.
+
+    En SQL Server se usa MERGE ... WITH (HOLDLOCK), que es atómico frente a
+    escrituras concurrentes. En el resto de motores se usa
+    bulk_create(update_conflicts=True), es decir INSERT ... ON CONFLICT, que
+    requiere una restricción única sobre `campos_clave`.
+
+    Los campos auto_now (p. ej. updated_at) se actualizan siempre. Cuando el
+    motor lo permite, se asigna la clave primaria a cada objeto.
+    Los objetos no pueden repetir la misma clave dentro de una llamada.
+    """
+    if not objetos:
+        return
+    campos_actualizar = list(campos_actualizar) + [
+        f.name for f in modelo._meta.concrete_fields
+        if getattr(f, 'auto_now', False) and f.name not in campos_actualizar
+    ]
+    alias = router.db_for_write(modelo)
+    connection = connections[alias]
+
+    if connection.vendor == 'microsoft':
+        _merge_sqlserver(connection, modelo, objetos, campos_clave, campos_actualizar, batch_size)
+    else:
+        modelo.objects.using(alias).bulk_create(
+            objetos,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=campos_clave,
+            update_fields=campos_actualizar,
+        )
+
+
+def _merge_sqlserver(connection, modelo, objetos, campos_clave, campos_actualizar, batch_size):
+    qn = connection.ops.quote_name
+    opts = modelo._meta
+    campos = [f for f in opts.concrete_fields if f is not opts.auto_field]
+    columnas = [qn(f.column) for f in campos]
+    campos_de_clave = [opts.get_field(nombre) for nombre in campos_clave]
+    clave = [qn(f.column) for f in campos_de_clave]
+    actualizar = [qn(opts.get_field(nombre).column) for nombre in campos_actualizar]
+
+    fila_sql = '(' + ', '.join(['%s'] * len(campos)) + ')'
+    batch_size = max(1, min(batch_size, MAX_PARAMETROS_SQLSERVER // len(campos)))
+
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(objetos), batch_size):
+            lote = objetos[inicio:inicio + batch_size]
+            params = []
+            for obj in lote:
+                for campo in campos:
+                    params.append(campo.get_db_prep_save(campo.pre_save(obj, True), connection=connection))
+
+            sql = (
+                f"MERGE INTO {qn(opts.db_table)} WITH (HOLDLOCK) AS destino "
+                f"USING (VALUES {', '.join([fila_sql] * len(lote))}) AS origen ({', '.join(columnas)}) "
+                f"ON {' AND '.join(f'destino.{c} = origen.{c}' for c in clave)} "
+                f"WHEN MATCHED THEN UPDATE SET {', '.join(f'destino.{c} = origen.{c}' for c in actualizar)} "
+                f"WHEN NOT MATCHED THEN INSERT ({', '.join(columnas)}) "
+                f"VALUES ({', '.join(f'origen.{c}' for c in columnas)}) "
+                f"OUTPUT inserted.{qn(opts.pk.column)}, {', '.join(f'inserted.{c}' for c in clave)};"
+            )
+            cursor.execute(sql, params)
+
+            # Asignar las claves primarias devueltas por OUTPUT a cada objeto
+            por_clave = {tuple(getattr(obj, f.attname) for f in campos_de_clave): obj for obj in lote}
+            for pk, *valores_clave in cursor.fetchall():
+                obj = por_clave.get(tuple(valores_clave))
+                if obj is not None:
+                    obj.pk = pk
@@ -7,9 +7,17 @@
     path('', views.lista_misiones, name='misiones'),
     path('api/misiones/<int:mision_id>/intentos/', views.obtener_intentos_mision, name='obtener_intentos_mision'),
     path('api/misiones/intentos/<int:intento_id>/', views.actualizar_estado_intento, name='actualizar_estado_intento'),
+    path('api/misiones/intentos/revisar/', views.revisar_intentos_lote, name='revisar_intentos_lote'),
+    path('api/misiones/catalogo/', views.catalogo_misiones, name='catalogo_misiones'),
+    path('api/<int:mision_id>/tarjeta/', views.tarjeta_mision, name='tarjeta_mision'),
+    path('api/<int:mision_id>/bootstrap/', views.bootstrap_mision, name='bootstrap_mision'),
     path('api/misiones/<int:mision_id>/alternativas/', views.obtener_alternativas_mision, name='obtener_alternativas_mision'),
     path('guardar-intento/', views.guardar_intento_mision, name='guardar_intento'),
+    path('guardar-intentos/', views.guardar_intentos_mision_lote, name='guardar_intentos_lote'),
+    path('api/habilidades/<int:habilidad_id>/icono/', views.icono_habilidad, name='icono_habilidad'),
+    path('api/trofeos/<int:trofeo_id>/icono/', views.icono_trofeo, name='icono_trofeo'),
     path('api/polya/<int:mision_id>/', views.obtener_polya_um, name='obtener_polya_um'),
     path('api/polya/<int:mision_id>/guardar/', views.guardar_polya_um, name='guardar_polya_um'),
+    path('api/polya/<int:mision_id>/autoguardar/', views.autoguardar_polya_um, name='autoguardar_polya_um'),
     path('api/polya/<int:mision_id>/estudiante/<int:usuario_id>/', views.obtener_polya_um_estudiante, name='obtener_polya_um_estudiante'),
 ]
\ No newline at end of file
@@ -1,18 +1,141 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
-from django.db.models import F
-from .models import Mision, Habilidad, IntentoMision, PolyaTrabajoUM, Sumandos
+from django.db.models import F, Case, When, Value, IntegerField, OuterRef, Subquery, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.db import transaction
+from .models import Mision, Habilidad, IntentoMision, PolyaTrabajoUM, Sumandos, Trofeo
+from .estadisticas import recalcular_estadistica, recalcular_estadisticas
+from .calificador import ESTADOS_PENDIENTES, calificar_respuesta, respuestas_mision
+from .upsert import bulk_upsert, upsert
+from .condicional import condicion_por_version
+from .iconos import TAMANOS_MINIATURA, miniatura, obtener_icono
+from .snapshot import obtener_snapshot
+from web_project.catalogos import CATALOGOS_TIMEOUT, obtener_catalogo, version_tabla
 import logging
 import json
-from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import condition, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import cache_control
 from django.utils import timezone
-from apps.biblioteca.models import Biblioteca_Usuario, Biblioteca_Contenido
+from django.conf import settings
+from django.core.cache import cache
 
 # Configurar el logger
 logger = logging.getLogger(__name__)
+
+# Orden de presentación de las misiones por tipo de operación
+TIPOS_EN_ORDEN = ['suma', 'resta', 'multiplicacion', 'division']
+MISIONES_POR_TIPO = 10
+
+# Tarjetas que lista_misiones renderiza de entrada; el resto llega desde catalogo_misiones
+MISIONES_PRIMERA_PANTALLA = 10
+MISIONES_POR_PAGINA_MAX = 100
+
+# Columnas de Mision que usan la lista, el catálogo y las tarjetas
+CAMPOS_MISION = ('mision_id', 'titulo', 'descripcion', 'habilidad_id', 'tipo_operacion', 'activa', 'fecha_creacion')
+
+# Tamaño máximo de un lote en guardar_intentos_mision_lote y revisar_intentos_lote
+MAX_INTENTOS_LOTE = 500
+
+# Campos del trabajo de Pólya que el estudiante puede editar
+CAMPOS_TEXTO_POLYA = (
+    'que_se_pide',
+    'datos_conocidos',
+    'incognitas',
+    'representacion',
+    'estrategia_principal',
+    'desarrollo',
+    'resultados_intermedios',
+    'revision_verificacion',
+    'comprobacion_otro_metodo',
+    'conclusion_final',
+    'identificacion_operacion',
+    'por_que_esa_operacion',
+)
+CAMPOS_BOOLEANOS_POLYA = (
+    'tactica_similar',
+    'tactica_descomponer',
+    'tactica_ecuaciones',
+    'tactica_formula',
+)
+
+
+def _consulta_misiones_ordenadas():
+    """
+    Misiones activas ordenadas en la base de datos: primero hasta
+    MISIONES_POR_TIPO misiones de cada tipo en TIPOS_EN_ORDEN y después el
+    resto por fecha de creación. La posición dentro de cada tipo se calcula
+    con ROW_NUMBER() particionado por tipo_operacion.
+    """
+    orden_tipo = Case(
+        *[When(tipo_operacion=tipo, then=Value(i)) for i, tipo in enumerate(TIPOS_EN_ORDEN)],
+        default=Value(len(TIPOS_EN_ORDEN)),
+        output_field=IntegerField(),
+    )
+    return (
+        Mision.objects.filter(activa=True)
+        .annotate(
+            posicion_tipo=Window(
+                expression=RowNumber(),
+                partition_by=[F('tipo_operacion')],
+                order_by=[F('fecha_creacion').asc(), F('mision_id').asc()],
+            ),
+        )
+        .annotate(
+            grupo=Case(
+                When(posicion_tipo__lte=MISIONES_POR_TIPO, then=orden_tipo),
+                default=Value(len(TIPOS_EN_ORDEN)),
+                output_field=IntegerField(),
+            ),
+        )
+        .order_by('grupo', 'fecha_creacion', 'mision_id')
+        .values(*CAMPOS_MISION)
+    )
+
+
+def _misiones_ordenadas():
+    """
+    Resultado de _consulta_misiones_ordenadas guardado en el caché bajo la
+    versión de la tabla de misiones, igual que los catálogos.
+    """
+    clave = f'misiones:ordenadas:{version_tabla(Mision)}'
+    misiones = cache.get(clave)
+    if misiones is None:
+        misiones = list(_consulta_misiones_ordenadas())
+        cache.set(clave, misiones, timeout=CATALOGOS_TIMEOUT)
+    return misiones
+
+
+def _con_estado_del_usuario(misiones, usuario):
+    """
+    Añade a cada misión el estado del último intento del usuario
+    (`estado_actual`) y si está bloqueada para él (`bloqueada`).
+    """
+    try:
+        rol_usuario = getattr(usuario.rol, 'tipo', '')
+    except Exception:
+        rol_usuario = ''
+
+    # Intentos y tipos de misión desbloqueados (por defecto bloqueadas)
+    snapshot = obtener_snapshot(usuario)
+
+    for mision in misiones:
+        mision['estado_actual'] = snapshot.ultimo_estado(mision['mision_id']) or 'pendiente'
+
+        # Calcular si la misión está bloqueada para el usuario actual
+        if rol_usuario == 'Profesor':
+            mision['bloqueada'] = False
+        else:
+            mision['bloqueada'] = snapshot.bloqueada(mision['tipo_operacion'])
+    return misiones
+
+
+def _misiones_del_usuario(usuario):
+    """Misiones de _misiones_ordenadas con el estado del usuario (_con_estado_del_usuario)."""
+    return _con_estado_del_usuario(_misiones_ordenadas(), usuario)
+
  
 @login_required
 @require_http_methods(["POST"])
@@ -28,16 +151,25 @@ def guardar_intento_mision(request):
         # Validate that the mission exists
         mision = get_object_or_404(Mision, pk=mision_id)
         
-        # Create or update the mission attempt
-        intento, created = IntentoMision.objects.update_or_create(
-            usuario=request.user,
-            mision=mision,
-            defaults={
-                'estado': estado,
-                'solucion_propuesta': solucion,
-                'fecha_intento': timezone.now()
-            }
-        )
+        # Grade the answer automatically; ambiguous answers stay pending for the teacher
+        if estado in ESTADOS_PENDIENTES:
+            estado = calificar_respuesta(solucion, *respuestas_mision(
+                mision.solucion_correcta, mision.alternativa1, mision.alternativa2, mision.alternativa3
+            )) or estado
+
+        # Create or update the mission attempt in a single atomic statement
+        # and refresh the student's stats row in the same transaction
+        with transaction.atomic():
+            intento = upsert(
+                IntentoMision,
+                {'usuario': request.user, 'mision': mision},
+                {
+                    'estado': estado,
+                    'solucion_propuesta': solucion,
+                    'fecha_intento': timezone.now()
+                }
+            )
+            recalcular_estadistica(request.user.pk)
         
         return JsonResponse({
             'status': 'success',
@@ -66,6 +198,180 @@ def guardar_intento_mision(request):
             status=500
         )
 
+@login_required
+@require_http_methods(["POST"])
+@csrf_exempt
+def guardar_intentos_mision_lote(request):
+    """
+    Guarda varios intentos de una vez (p. ej. intentos encolados sin conexión).
+    Acepta una lista de {mision_id, solucion, estado}, o {"intentos": [...]}.
+    Las misiones se validan con una sola consulta y todos los intentos válidos
+    se escriben con un único upsert; la respuesta trae un resultado por elemento.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        logger.error("Error al decodificar JSON en guardar_intentos_mision_lote")
+        return JsonResponse({'status': 'error', 'message': 'Formato JSON inválido'}, status=400)
+
+    items = data.get('intentos') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return JsonResponse({'status': 'error', 'message': 'Se esperaba una lista de intentos'}, status=400)
+    if len(items) > MAX_INTENTOS_LOTE:
+        return JsonResponse(
+            {'status': 'error', 'message': f'Máximo {MAX_INTENTOS_LOTE} intentos por lote'},
+            status=400
+        )
+
+    # Los mismos estados que envía el cliente a guardar_intento_mision: los
+    # pendientes (en_revision incluido) se califican y los finales se guardan tal cual
+    estados_validos = {valor for valor, _etiqueta in IntentoMision.ESTADO_CHOICES} | set(ESTADOS_PENDIENTES)
+    mision_ids = set()
+    for item in items:
+        try:
+            mision_ids.add(int(item.get('mision_id')))
+        except (AttributeError, TypeError, ValueError):
+            pass
+    # Una sola consulta valida las misiones y trae sus respuestas para calificar
+    existentes = {
+        mision_id: respuestas_mision(*respuestas)
+        for mision_id, *respuestas in Mision.objects.filter(pk__in=mision_ids).order_by().values_list(
+            'pk', 'solucion_correcta', 'alternativa1', 'alternativa2', 'alternativa3'
+        )
+    }
+
+    ahora = timezone.now()
+    resultados = []
+    por_mision = {}
+    for indice, item in enumerate(items):
+        try:
+            mision_id = int(item.get('mision_id'))
+        except (AttributeError, TypeError, ValueError):
+            resultados.append({'indice': indice, 'status': 'error', 'message': 'mision_id inválido'})
+            continue
+        estado = item.get('estado', 'en_progreso')
+        if mision_id not in existentes:
+            resultados.append({'indice': indice, 'mision_id': mision_id, 'status': 'error',
+                               'message': 'La misión especificada no existe'})
+            continue
+        if estado not in estados_validos:
+            resultados.append({'indice': indice, 'mision_id': mision_id, 'status': 'error',
+                               'message': 'Estado inválido'})
+            continue
+        if estado in ESTADOS_PENDIENTES:
+            estado = calificar_respuesta(item.get('solucion', ''), *existentes[mision_id]) or estado
+        # Si una misión aparece varias veces en el lote, gana el último intento
+        por_mision[mision_id] = (indice, IntentoMision(
+            usuario_id=request.user.pk,
+            mision_id=mision_id,
+            estado=estado,
+            solucion_propuesta=item.get('solucion', ''),
+            fecha_intento=ahora,
+        ))
+
+    try:
+        with transaction.atomic():
+            bulk_upsert(
+                IntentoMision,
+                [intento for _indice, intento in por_mision.values()],
+                campos_clave=['usuario', 'mision'],
+                campos_actualizar=['estado', 'solucion_propuesta', 'fecha_intento'],
+            )
+            if por_mision:
+                recalcular_estadistica(request.user.pk)
+    except Exception as e:
+        logger.error(f"Error al guardar el lote de intentos: {str(e)}", exc_info=True)
+        return JsonResponse({'status': 'error', 'message': 'Error interno del servidor'}, status=500)
+
+    for indice, intento in por_mision.values():
+        resultados.append({'indice': indice, 'mision_id': intento.mision_id, 'status': 'success',
+                           'estado': intento.estado})
+    resultados.sort(key=lambda r: r['indice'])
+
+    return JsonResponse({
+        'status': 'success',
+        'guardados': len(por_mision),
+        'fecha': ahora.strftime('%Y-%m-%d %H:%M:%S'),
+        'resultados': resultados,
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+def revisar_intentos_lote(request):
+    """
+    Revisión por lotes del profesor. Acepta una lista de {intento_id, estado}
+    (o {"revisiones": [...]}) y aplica todos los cambios con un solo
+    bulk_update dentro de una transacción; las estadísticas de los
+    estudiantes afectados se recalculan juntas. Devuelve un resultado por
+    elemento.
+    """
+    try:
+        es_profesor = getattr(request.user.rol, 'tipo', '') in ('Profesor', 'Administrador')
+    except Exception:
+        es_profesor = False
+    if not es_profesor:
+        return JsonResponse({'status': 'forbidden', 'message': 'Solo profesores'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        logger.error("Error al decodificar JSON en revisar_intentos_lote")
+        return JsonResponse({'status': 'error', 'message': 'Formato JSON inválido'}, status=400)
+
+    items = data.get('revisiones') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return JsonResponse({'status': 'error', 'message': 'Se esperaba una lista de revisiones'}, status=400)
+    if len(items) > MAX_INTENTOS_LOTE:
+        return JsonResponse(
+            {'status': 'error', 'message': f'Máximo {MAX_INTENTOS_LOTE} revisiones por lote'},
+            status=400
+        )
+
+    estados_validos = {valor for valor, _etiqueta in IntentoMision.ESTADO_CHOICES}
+    resultados = []
+    decisiones = {}
+    for indice, item in enumerate(items):
+        try:
+            intento_id = int(item.get('intento_id'))
+        except (AttributeError, TypeError, ValueError):
+            resultados.append({'indice': indice, 'status': 'error', 'message': 'intento_id inválido'})
+            continue
+        estado = item.get('estado')
+        if estado not in estados_validos:
+            resultados.append({'indice': indice, 'intento_id': intento_id, 'status': 'error',
+                               'message': 'Estado inválido'})
+            continue
+        # Si un intento aparece varias veces en el lote, gana la última decisión
+        decisiones[intento_id] = (indice, estado)
+
+    revisados = []
+    try:
+        with transaction.atomic():
+            intentos = IntentoMision.objects.select_for_update().in_bulk(list(decisiones))
+            for intento_id, (indice, estado) in decisiones.items():
+                intento = intentos.get(intento_id)
+                if intento is None:
+                    resultados.append({'indice': indice, 'intento_id': intento_id, 'status': 'error',
+                                       'message': 'Intento no encontrado'})
+                    continue
+                intento.estado = estado
+                revisados.append((indice, intento))
+
+            IntentoMision.objects.bulk_update([intento for _indice, intento in revisados], ['estado'])
+            recalcular_estadisticas({intento.usuario_id for _indice, intento in revisados})
+    except Exception as e:
+        logger.error(f"Error al revisar el lote de intentos: {str(e)}", exc_info=True)
+        return JsonResponse({'status': 'error', 'message': 'Error interno del servidor'}, status=500)
+
+    for indice, intento in revisados:
+        resultados.append({'indice': indice, 'intento_id': intento.intento_id, 'status': 'success',
+                           'estado': intento.estado})
+    resultados.sort(key=lambda r: r['indice'])
+
+    return JsonResponse({'status': 'success', 'revisados': len(revisados), 'resultados': resultados})
+
+
 def lista_misiones(request):
     if not request.user.is_authenticated:
         from django.contrib.auth import authenticate, login
@@ -75,103 +381,29 @@ def lista_misiones(request):
 
     logger.info("Iniciando vista lista_misiones")
     
-    # Obtener todas las misiones activas
+    # Obtener todas las misiones activas, ya ordenadas, y el estado del usuario
     logger.info("Obteniendo misiones activas")
     try:
-        misiones_qs = Mision.objects.filter(activa=True).select_related('habilidad')
-        logger.info(f"Se encontraron {misiones_qs.count()} misiones activas")
-
-        # Reordenar misiones por tipo_operacion, máximo 10 por tipo en orden definido
-        tipos_en_orden = ['suma', 'resta', 'multiplicacion', 'division']
-        misiones_ordenadas = []
-        for tipo in tipos_en_orden:
-            for m in misiones_qs.filter(tipo_operacion=tipo).order_by('fecha_creacion')[:10]:
-                misiones_ordenadas.append(m)
-
-        # Agregar cualquier misión de otros tipos (o sobrantes) al final, sin duplicar
-        ids_ya_incluidos = {m.mision_id for m in misiones_ordenadas}
-        for m in misiones_qs.exclude(mision_id__in=ids_ya_incluidos).order_by('fecha_creacion'):
-            misiones_ordenadas.append(m)
-
-        # Determinar tipos de misión desbloqueados por el usuario (por defecto bloqueadas)
-        unlocked_types = set()
-        try:
-            rol_usuario = getattr(request.user.rol, 'tipo', '')
-        except Exception:
-            rol_usuario = ''
-
-        if rol_usuario == 'Estudiante':
-            try:
-                biblioteca_ids = list(
-                    Biblioteca_Usuario.objects.filter(usuario=request.user, estado=True)
-                    .values_list('biblioteca_id', flat=True)
-                )
-                if biblioteca_ids:
-                    tipos_contenido = Biblioteca_Contenido.objects.filter(
-                        biblioteca_id__in=biblioteca_ids
-                    ).values_list('tipo', flat=True)
-                    for t in tipos_contenido:
-                        s = (t or '').strip().lower()
-                        # normalizar acentos comunes
-                        s = (s
-                             .replace('á', 'a')
-                             .replace('é', 'e')
-                             .replace('í', 'i')
-                             .replace('ó', 'o')
-                             .replace('ú', 'u'))
-                        # mapear posibles variantes a los choices de Mision.tipo_operacion
-                        if s in {'suma', 'resta', 'multiplicacion', 'division'}:
-                            unlocked_types.add(s)
-                        elif 'suma' in s:
-                            unlocked_types.add('suma')
-                        elif 'resta' in s:
-                            unlocked_types.add('resta')
-                        elif 'multiplic' in s:
-                            unlocked_types.add('multiplicacion')
-                        elif 'divis' in s:
-                            unlocked_types.add('division')
-            except Exception as e:
-                logger.warning(f"No se pudieron obtener tipos desbloqueados: {e}")
-
-        # Crear una lista para almacenar las misiones con su estado
-        misiones_con_estado = []
-
-        for mision in misiones_ordenadas:
-            logger.info(f"Procesando misión ID: {mision.mision_id} - {mision.titulo}")
-            # Obtener el último intento del usuario para esta misión
-            try:
-                intento = IntentoMision.objects.filter(
-                    usuario=request.user,
-                    mision=mision
-                ).latest('fecha_intento')
-                estado = intento.estado
-                logger.info(f"  - Último intento: {estado}")
-            except IntentoMision.DoesNotExist:
-                estado = 'pendiente'
-                logger.info("  - Sin intentos previos")
-                
-            # Agregar el estado como atributo a la misión
-            mision.estado_actual = estado
-
-            # Calcular si la misión está bloqueada para el usuario actual
-            if rol_usuario == 'Profesor':
-                mision.bloqueada = False
-            else:
-                mision.bloqueada = ((mision.tipo_operacion or '').strip().lower() not in unlocked_types)
-            misiones_con_estado.append(mision)
+        misiones_con_estado = _misiones_del_usuario(request.user)
+        logger.info(f"Se encontraron {len(misiones_con_estado)} misiones activas")
         
         # Obtener todas las habilidades para los filtros
         try:
-            habilidades = Habilidad.objects.all()
-            logger.info(f"Se encontraron {habilidades.count()} habilidades")
+            habilidades = obtener_catalogo('habilidades')
+            logger.info(f"Se encontraron {len(habilidades)} habilidades")
         except Exception as e:
             logger.error(f"Error al obtener habilidades: {str(e)}")
             habilidades = []
          
         user_role = request.user.rol.tipo
+        # Solo la primera pantalla; la página pide el resto a catalogo_misiones
         context = {
-            'misiones': misiones_con_estado,
+            'misiones': misiones_con_estado[:MISIONES_PRIMERA_PANTALLA],
+            'total_misiones': len(misiones_con_estado),
+            'misiones_por_pagina': MISIONES_PRIMERA_PANTALLA,
             'habilidades': habilidades, 
+            # Parte de la clave del caché de fragmentos de mision_card
+            'version_misiones': version_tabla(Mision),
         }
         
         # Agregar datos de depuración al contexto
@@ -180,7 +412,7 @@ def lista_misiones(request):
             'usuario': request.user.nombre_usuario,
         }
         
-        logger.info(f"Contexto preparado con {len(misiones_con_estado)} misiones")
+        logger.info(f"Contexto preparado con {len(context['misiones'])} de {len(misiones_con_estado)} misiones")
         
     except Exception as e:
         logger.error(f"Error en la vista lista_misiones: {str(e)}", exc_info=True)
@@ -197,6 +429,70 @@ def lista_misiones(request):
     return render(request, 'dashboards/misiones.html', context)
 
 
+@login_required
+@require_http_methods(["GET"])
+def catalogo_misiones(request):
+    """
+    Página del catálogo de misiones en filas compactas (sin descripción ni
+    trabajo de Pólya), en el mismo orden que lista_misiones. Filtros
+    opcionales: `habilidad`, `tipo_operacion` y `estado`. Se pagina con
+    `desde` y `limite`; `siguiente` es el `desde` de la próxima página o null.
+    """
+    try:
+        desde = max(int(request.GET.get('desde', 0)), 0)
+        limite = min(max(int(request.GET.get('limite', MISIONES_PRIMERA_PANTALLA)), 1), MISIONES_POR_PAGINA_MAX)
+        habilidad = request.GET.get('habilidad')
+        habilidad = int(habilidad) if habilidad else None
+    except (TypeError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'Parámetros inválidos'}, status=400)
+    tipo_operacion = request.GET.get('tipo_operacion')
+    estado = request.GET.get('estado')
+
+    try:
+        misiones = [
+            mision for mision in _misiones_del_usuario(request.user)
+            if (habilidad is None or mision['habilidad_id'] == habilidad)
+            and (not tipo_operacion or mision['tipo_operacion'] == tipo_operacion)
+            and (not estado or mision['estado_actual'] == estado)
+        ]
+    except Exception as e:
+        logger.error(f"Error al obtener el catálogo de misiones: {str(e)}", exc_info=True)
+        return JsonResponse({'status': 'error', 'message': 'Error interno del servidor'}, status=500)
+
+    pagina = misiones[desde:desde + limite]
+    siguiente = desde + limite if desde + limite < len(misiones) else None
+    return JsonResponse({
+        'status': 'success',
+        'misiones': [
+            {
+                'mision_id': mision['mision_id'],
+                'titulo': mision['titulo'],
+                'habilidad_id': mision['habilidad_id'],
+                'tipo_operacion': mision['tipo_operacion'],
+                'estado': mision['estado_actual'],
+                'bloqueada': mision['bloqueada'],
+            }
+            for mision in pagina
+        ],
+        'total': len(misiones),
+        'siguiente': siguiente,
+    })
+
+
+@login_required
+@require_http_methods(["GET"])
+def tarjeta_mision(request, mision_id):
+    """HTML de la tarjeta completa de una misión, para cargarla cuando se necesita."""
+    mision = Mision.objects.filter(pk=mision_id, activa=True).values(*CAMPOS_MISION).first()
+    if mision is None:
+        return JsonResponse({'status': 'error', 'message': 'Misión no encontrada'}, status=404)
+    _con_estado_del_usuario([mision], request.user)
+    return render(request, 'dashboards/partials/mision_card_cacheada.html', {
+        'mision': mision,
+        'version_misiones': version_tabla(Mision),
+    })
+
+
 
 @require_http_methods(["GET"])
 def obtener_intentos_mision(request, mision_id):
@@ -217,9 +513,11 @@ def obtener_intentos_mision(request, mision_id):
 def actualizar_estado_intento(request, intento_id):
     try:
         data = json.loads(request.body)
-        intento = IntentoMision.objects.get(intento_id=intento_id)
-        intento.estado = data.get('estado', 'pendiente')
-        intento.save()
+        with transaction.atomic():
+            intento = IntentoMision.objects.get(intento_id=intento_id)
+            intento.estado = data.get('estado', 'pendiente')
+            intento.save()
+            recalcular_estadistica(intento.usuario_id)
         return JsonResponse({'status': 'success'})
     except IntentoMision.DoesNotExist:
         return JsonResponse({'error': 'Intento no encontrado'}, status=404)
@@ -227,58 +525,123 @@ def actualizar_estado_intento(request, intento_id):
         return JsonResponse({'error': str(e)}, status=400)
 
 
+def _alternativas_mision(mision):
+    """Alternativas no vacías de la misión y su solución correcta."""
+    alternativas = []
+    for campo in ['alternativa1', 'alternativa2', 'alternativa3']:
+        val = getattr(mision, campo, None)
+        if isinstance(val, str) and val.strip():
+            alternativas.append(val.strip())
+    solucion_correcta = ''
+    valc = getattr(mision, 'solucion_correcta', None)
+    if isinstance(valc, str) and valc.strip():
+        solucion_correcta = valc.strip()
+    return alternativas, solucion_correcta
+
+
+def _datos_polya(polya, sumandos):
+    """Trabajo de Pólya serializado para el editor; vacío si aún no existe."""
+    datos = {campo: (getattr(polya, campo, None) or '') for campo in CAMPOS_TEXTO_POLYA}
+    datos.update({campo: bool(getattr(polya, campo, False)) for campo in CAMPOS_BOOLEANOS_POLYA})
+    datos['confianza'] = polya.confianza if polya is not None else None
+    datos['sumandos'] = list(sumandos)
+    datos['version'] = _version_polya(polya) if polya is not None else None
+    return datos
+
+
+@login_required
+@require_http_methods(["GET"])
+def bootstrap_mision(request, mision_id):
+    """
+    Todo lo que necesita la tarjeta de una misión al abrirse, en una sola
+    respuesta: alternativas, trabajo de Pólya del usuario con sus sumandos y
+    último intento. Se resuelve con tres consultas como máximo: la misión con
+    el último intento anotado, el trabajo de Pólya y sus sumandos.
+    """
+    ultimo = IntentoMision.objects.filter(
+        usuario_id=request.user.pk,
+        mision=OuterRef('pk'),
+    ).order_by('-fecha_intento', '-intento_id')
+    mision = get_object_or_404(
+        Mision.objects.annotate(
+            ultimo_intento_id=Subquery(ultimo.values('intento_id')[:1]),
+            ultimo_estado=Subquery(ultimo.values('estado')[:1]),
+            ultimo_fecha=Subquery(ultimo.values('fecha_intento')[:1]),
+            ultima_solucion=Subquery(ultimo.values('solucion_propuesta')[:1]),
+        ),
+        pk=mision_id,
+    )
+    try:
+        polya = (
+            PolyaTrabajoUM.objects.filter(usuario=request.user, mision=mision)
+            .prefetch_related(Prefetch('sumandos_set', queryset=Sumandos.objects.order_by('sumando_id')))
+            .first()
+        )
+        sumandos = [s.sumando for s in polya.sumandos_set.all()] if polya else []
+        alternativas, solucion_correcta = _alternativas_mision(mision)
+
+        ultimo_intento = None
+        if mision.ultimo_intento_id is not None:
+            ultimo_intento = {
+                'intento_id': mision.ultimo_intento_id,
+                'estado': mision.ultimo_estado,
+                'fecha_intento': mision.ultimo_fecha.isoformat() if mision.ultimo_fecha else None,
+                'solucion_propuesta': mision.ultima_solucion or '',
+            }
+
+        return JsonResponse({
+            'status': 'success',
+            'mision_id': mision.mision_id,
+            'alternativas': alternativas,
+            'solucion_correcta': solucion_correcta,
+            'polya': _datos_polya(polya, sumandos),
+            'ultimo_intento': ultimo_intento,
+        })
+    except Exception as e:
+        logger.error(f"Error en bootstrap_mision: {str(e)}", exc_info=True)
+        return JsonResponse({'status': 'error', 'message': 'Error interno del servidor'}, status=500)
+
+
+def _version_polya_um(request, mision_id):
+    """Versión del trabajo de Pólya del usuario con una sola búsqueda por índice único."""
+    fila = (
+        PolyaTrabajoUM.objects.filter(usuario_id=request.user.pk, mision_id=mision_id)
+        .values_list('id', 'updated_at', 'mision__solucion_correcta')
+        .first()
+    )
+    if fila is None or fila[1] is None:
+        return None
+    polya_id, updated_at, solucion_correcta = fila
+    return f"{polya_id}:{updated_at.isoformat()}:{solucion_correcta}", updated_at
+
+
+def _version_alternativas(request, mision_id):
+    """Las alternativas no tienen marca de tiempo; su huella son los propios valores."""
+    fila = (
+        Mision.objects.filter(pk=mision_id)
+        .values_list('alternativa1', 'alternativa2', 'alternativa3', 'solucion_correcta')
+        .first()
+    )
+    if fila is None:
+        return None
+    return '|'.join(str(valor) for valor in fila), None
+
+
 @login_required
 @require_http_methods(["GET"]) 
+@cache_control(private=True, no_cache=True)
+@condicion_por_version(_version_polya_um)
 def obtener_polya_um(request, mision_id):
     try:
         mision = get_object_or_404(Mision, pk=mision_id)
-        try:
-            polya = PolyaTrabajoUM.objects.get(usuario=request.user, mision=mision)
-            data = {
-                'que_se_pide': polya.que_se_pide or '',
-                'datos_conocidos': polya.datos_conocidos or '',
-                'incognitas': polya.incognitas or '',
-                'representacion': polya.representacion or '',
-                'estrategia_principal': polya.estrategia_principal or '',
-                'tactica_similar': bool(polya.tactica_similar),
-                'tactica_descomponer': bool(polya.tactica_descomponer),
-                'tactica_ecuaciones': bool(polya.tactica_ecuaciones),
-                'tactica_formula': bool(polya.tactica_formula),
-                'desarrollo': polya.desarrollo or '',
-                'resultados_intermedios': polya.resultados_intermedios or '',
-                'revision_verificacion': polya.revision_verificacion or '',
-                'comprobacion_otro_metodo': polya.comprobacion_otro_metodo or '',
-                'conclusion_final': polya.conclusion_final or '',
-                'confianza': polya.confianza if polya.confianza is not None else None,
-                'identificacion_operacion': getattr(polya, 'identificacion_operacion', '') or '',
-                'por_que_esa_operacion': getattr(polya, 'por_que_esa_operacion', '') or '',
-                'sumandos': list(Sumandos.objects.filter(polya_um_id=polya).values_list('sumando', flat=True)),
-                'solucion_correcta': mision.solucion_correcta or '',
-            }
-            return JsonResponse({'status': 'success', 'data': data})
-        except PolyaTrabajoUM.DoesNotExist:
-            data = {
-                'que_se_pide': '',
-                'datos_conocidos': '',
-                'incognitas': '',
-                'representacion': '',
-                'estrategia_principal': '',
-                'tactica_similar': False,
-                'tactica_descomponer': False,
-                'tactica_ecuaciones': False,
-                'tactica_formula': False,
-                'desarrollo': '',
-                'resultados_intermedios': '',
-                'revision_verificacion': '',
-                'comprobacion_otro_metodo': '',
-                'conclusion_final': '',
-                'confianza': None,
-                'identificacion_operacion': '',
-                'por_que_esa_operacion': '',
-                'sumandos': [],
-                'solucion_correcta': mision.solucion_correcta or '',
-            }
-            return JsonResponse({'status': 'success', 'data': data})
+        polya = PolyaTrabajoUM.objects.filter(usuario=request.user, mision=mision).first()
+        sumandos = (
+            list(Sumandos.objects.filter(polya_um_id=polya).order_by('sumando_id').values_list('sumando', flat=True))
+            if polya else []
+        )
+        data = _datos_polya(polya, sumandos)
+        data['solucion_correcta'] = mision.solucion_correcta or ''
+        return JsonResponse({'status': 'success', 'data': data})
     except Exception as e:
         logger.error(f"Error en obtener_polya_um: {str(e)}", exc_info=True)
         return JsonResponse({'status': 'error', 'message': 'Error interno del servidor'}, status=500)
@@ -286,18 +649,12 @@ def obtener_polya_um(request, mision_id):
 
 @login_required
 @require_http_methods(["GET"]) 
+@cache_control(private=True, no_cache=True)
+@condicion_por_version(_version_alternativas)
 def obtener_alternativas_mision(request, mision_id):
     try:
         mision = get_object_or_404(Mision, pk=mision_id)
-        alternativas = []
-        for campo in ['alternativa1', 'alternativa2', 'alternativa3']:
-            val = getattr(mision, campo, None)
-            if isinstance(val, str) and val.strip():
-                alternativas.append(val.strip())
-        solucion_correcta = ''
-        valc = getattr(mision, 'solucion_correcta', None)
-        if isinstance(valc, str) and valc.strip():
-            solucion_correcta = valc.strip()
+        alternativas, solucion_correcta = _alternativas_mision(mision)
         return JsonResponse({'status': 'success', 'alternativas': alternativas, 'solucion_correcta': solucion_correcta})
     except Exception as e:
         logger.error(f"Error en obtener_alternativas_mision: {str(e)}", exc_info=True)
@@ -312,49 +669,47 @@ def guardar_polya_um(request, mision_id):
         payload = json.loads(request.body)
         mision = get_object_or_404(Mision, pk=mision_id)
 
-        polya, _created = PolyaTrabajoUM.objects.get_or_create(
-            usuario=request.user,
-            mision=mision
-        )
-
-        polya.que_se_pide = payload.get('que_se_pide')
-        polya.datos_conocidos = payload.get('datos_conocidos')
-        polya.incognitas = payload.get('incognitas')
-        polya.representacion = payload.get('representacion')
-        polya.estrategia_principal = payload.get('estrategia_principal')
-        polya.tactica_similar = bool(payload.get('tactica_similar'))
-        polya.tactica_descomponer = bool(payload.get('tactica_descomponer'))
-        polya.tactica_ecuaciones = bool(payload.get('tactica_ecuaciones'))
-        polya.tactica_formula = bool(payload.get('tactica_formula'))
-        polya.desarrollo = payload.get('desarrollo')
-        polya.resultados_intermedios = payload.get('resultados_intermedios')
-        polya.revision_verificacion = payload.get('revision_verificacion')
-        polya.comprobacion_otro_metodo = payload.get('comprobacion_otro_metodo')
-        polya.conclusion_final = payload.get('conclusion_final')
-        polya.identificacion_operacion = payload.get('identificacion_operacion')
-        polya.por_que_esa_operacion = payload.get('por_que_esa_operacion')
         confianza_val = payload.get('confianza')
         try:
-            polya.confianza = int(confianza_val) if confianza_val is not None else None
+            confianza = int(confianza_val) if confianza_val is not None else None
         except (TypeError, ValueError):
-            polya.confianza = None
-        polya.save()
+            confianza = None
+
+        # Crear o actualizar el trabajo de Pólya en una sola sentencia atómica
+        polya = upsert(
+            PolyaTrabajoUM,
+            {'usuario': request.user, 'mision': mision},
+            {
+                'que_se_pide': payload.get('que_se_pide'),
+                'datos_conocidos': payload.get('datos_conocidos'),
+                'incognitas': payload.get('incognitas'),
+                'representacion': payload.get('representacion'),
+                'estrategia_principal': payload.get('estrategia_principal'),
+                'tactica_similar': bool(payload.get('tactica_similar')),
+                'tactica_descomponer': bool(payload.get('tactica_descomponer')),
+                'tactica_ecuaciones': bool(payload.get('tactica_ecuaciones')),
+                'tactica_formula': bool(payload.get('tactica_formula')),
+                'desarrollo': payload.get('desarrollo'),
+                'resultados_intermedios': payload.get('resultados_intermedios'),
+                'revision_verificacion': payload.get('revision_verificacion'),
+                'comprobacion_otro_metodo': payload.get('comprobacion_otro_metodo'),
+                'conclusion_final': payload.get('conclusion_final'),
+                'identificacion_operacion': payload.get('identificacion_operacion'),
+                'por_que_esa_operacion': payload.get('por_que_esa_operacion'),
+                'confianza': confianza,
+            }
+        )
 
         # Actualizar sumandos asociados
         try:
             sumandos_payload = payload.get('sumandos', []) or []
             if not isinstance(sumandos_payload, list):
                 sumandos_payload = []
-            Sumandos.objects.filter(polya_um_id=polya).delete()
-            for s in sumandos_payload:
-                if isinstance(s, str):
-                    texto = s.strip()
-                    if texto:
-                        Sumandos.objects.create(polya_um_id=polya, sumando=texto)
+            _sincronizar_sumandos(polya, _textos_sumandos(sumandos_payload))
         except Exception as e:
             logger.error(f"Error al actualizar sumandos en guardar_polya_um: {str(e)}", exc_info=True)
 
-        return JsonResponse({'status': 'success'})
+        return JsonResponse({'status': 'success', 'version': _version_polya_guardada(polya)})
     except json.JSONDecodeError:
         return JsonResponse({'status': 'error', 'message': 'Formato JSON inválido'}, status=400)
     except Exception as e:
@@ -362,6 +717,148 @@ def guardar_polya_um(request, mision_id):
         return JsonResponse({'status': 'error', 'message': 'Error interno del servidor'}, status=500)
 
 
+def _version_polya(polya):
+    """Token de versión del trabajo de Pólya: su marca updated_at."""
+    return polya.updated_at.isoformat() if polya.updated_at else None
+
+
+def _version_polya_guardada(polya):
+    """
+    Token de versión tras guardar, con updated_at releído de la base de datos:
+    la columna datetime de SQL Server redondea a unos 3 ms y el valor en
+    memoria no coincidiría con el de la próxima lectura.
+    """
+    polya.updated_at = (
+        PolyaTrabajoUM.objects.filter(usuario_id=polya.usuario_id, mision_id=polya.mision_id)
+        .values_list('updated_at', flat=True)
+        .first()
+    )
+    return _version_polya(polya)
+
+
+def _textos_sumandos(valores):
+    return [v.strip() for v in valores if isinstance(v, str) and v.strip()]
+
+
+def _campos_polya(payload):
+    """
+    Valida y normaliza los campos de Pólya recibidos en un PATCH. Lanza
+    ValueError con el nombre del campo si alguno no existe o no es válido.
+    """
+    campos = {}
+    for campo, valor in payload.items():
+        if campo in CAMPOS_TEXTO_POLYA:
+            if valor is not None and not isinstance(valor, str):
+                raise ValueError(campo)
+            campos[campo] = valor
+        elif campo in CAMPOS_BOOLEANOS_POLYA:
+            campos[campo] = bool(valor)
+        elif campo == 'confianza':
+            try:
+                campos[campo] = int(valor) if valor not in (None, '') else None
+            except (TypeError, ValueError):
+                raise ValueError(campo)
+        else:
+            raise ValueError(campo)
+    return campos
+
+
+def _sincronizar_sumandos(polya, textos):
+    """
+    Deja los sumandos del trabajo iguales a `textos` conservando el prefijo
+    que no cambió: el resto se borra en una sola sentencia y los nuevos se
+    insertan con bulk_create. Devuelve True si hubo cambios.
+    """
+    actuales = list(
+        Sumandos.objects.filter(polya_um_id=polya).order_by('sumando_id').values_list('sumando_id', 'sumando')
+    )
+    comunes = 0
+    while comunes < min(len(actuales), len(textos)) and actuales[comunes][1] == textos[comunes]:
+        comunes += 1
+
+    sobrantes = [sumando_id for sumando_id, _texto in actuales[comunes:]]
+    nuevos = textos[comunes:]
+    if sobrantes:
+        Sumandos.objects.filter(sumando_id__in=sobrantes).delete()
+    if nuevos:
+        Sumandos.objects.bulk_create([Sumandos(polya_um_id=polya, sumando=texto) for texto in nuevos])
+    return bool(sobrantes or nuevos)
+
+
+@login_required
+@require_http_methods(["PATCH"])
+def autoguardar_polya_um(request, mision_id):
+    """
+    Autoguardado parcial del trabajo de Pólya. Recibe solo los campos que
+    cambiaron, la lista de sumandos si cambió y el token `version` devuelto
+    por la última lectura o guardado. Si el trabajo se modificó desde
+    entonces (otra pestaña u otro dispositivo) responde 409 con la versión
+    actual y no escribe nada.
+    """
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        payload = None
+    if not isinstance(payload, dict):
+        return JsonResponse({'status': 'error', 'message': 'Formato JSON inválido'}, status=400)
+
+    version = payload.pop('version', None)
+    sumandos = payload.pop('sumandos', None)
+    if sumandos is not None and not isinstance(sumandos, list):
+        return JsonResponse({'status': 'error', 'message': 'Campo no válido: sumandos'}, status=400)
+    try:
+        campos = _campos_polya(payload)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': f'Campo no válido: {e}'}, status=400)
+
+    mision = get_object_or_404(Mision, pk=mision_id)
+    try:
+        with transaction.atomic():
+            polya = (
+                PolyaTrabajoUM.objects.select_for_update()
+                .filter(usuario=request.user, mision=mision)
+                .first()
+            )
+            if polya is None:
+                if version is not None:
+                    return JsonResponse(
+                        {'status': 'conflict', 'message': 'El trabajo ya no existe', 'version': None}, status=409
+                    )
+                polya = upsert(PolyaTrabajoUM, {'usuario': request.user, 'mision': mision}, campos)
+                actualizados = list(campos)
+                if sumandos is not None:
+                    _sincronizar_sumandos(polya, _textos_sumandos(sumandos))
+                version = _version_polya_guardada(polya)
+            else:
+                if version != _version_polya(polya):
+                    return JsonResponse({
+                        'status': 'conflict',
+                        'message': 'El trabajo se modificó en otra sesión',
+                        'version': _version_polya(polya),
+                    }, status=409)
+
+                actualizados = [campo for campo, valor in campos.items() if getattr(polya, campo) != valor]
+                for campo in actualizados:
+                    setattr(polya, campo, campos[campo])
+                sumandos_cambiaron = (
+                    sumandos is not None and _sincronizar_sumandos(polya, _textos_sumandos(sumandos))
+                )
+                # updated_at avanza también cuando solo cambian los sumandos
+                version = _version_polya(polya)
+                if actualizados or sumandos_cambiaron:
+                    polya.save(update_fields=actualizados + ['updated_at'])
+                    version = _version_polya_guardada(polya)
+
+        return JsonResponse({
+            'status': 'success',
+            'version': version,
+            'campos_actualizados': actualizados,
+        })
+    except Exception as e:
+        logger.error(f"Error en autoguardar_polya_um: {str(e)}", exc_info=True)
+        return JsonResponse({'status': 'error', 'message': 'Error interno del servidor'}, status=500)
+
+
 @login_required
 @require_http_methods(["GET"]) 
 def obtener_polya_um_estudiante(request, mision_id, usuario_id):
@@ -409,4 +906,63 @@ def obtener_polya_um_estudiante(request, mision_id, usuario_id):
         return JsonResponse({'status': 'success', 'polya': data_polya, 'intento': data_intento})
     except Exception as e:
         logger.error(f"Error en obtener_polya_um_estudiante: {str(e)}", exc_info=True)
-        return JsonResponse({'status': 'error', 'message': 'Error interno del servidor'}, status=500)
\ No newline at end of file
+        return JsonResponse({'status': 'error', 'message': 'Error interno del servidor'}, status=500)
+
+
+# Los iconos cambian muy poco; el ETag permite revalidarlos al caducar
+ICONOS_MAX_AGE = getattr(settings, 'ICONOS_MAX_AGE', 7 * 24 * 60 * 60)
+
+# Política de los iconos servidos: sin scripts ni recursos externos, solo estilos en línea (SVG)
+CSP_ICONOS = "default-src 'none'; style-src 'unsafe-inline'"
+
+
+def _tamano_miniatura(request):
+    try:
+        tamano = int(request.GET.get('tam', 0))
+    except ValueError:
+        return None
+    return tamano if tamano in TAMANOS_MINIATURA else None
+
+
+def _etag_icono(request, icono):
+    if icono is None:
+        return None
+    return f"{icono[0]}-{_tamano_miniatura(request) or 'original'}"
+
+
+def _respuesta_icono(request, icono, nombre):
+    if icono is None:
+        return JsonResponse({'status': 'error', 'message': 'Icono no encontrado'}, status=404)
+    tamano = _tamano_miniatura(request)
+    if tamano:
+        datos, tipo = miniatura(icono, nombre, tamano)
+    else:
+        datos, tipo = icono[1], icono[2]
+    respuesta = HttpResponse(datos, content_type=tipo)
+    # Un SVG subido puede llevar <script>: abierto directamente desde esta URL
+    # no debe ejecutar nada en el origen de la aplicación
+    respuesta['Content-Security-Policy'] = CSP_ICONOS
+    respuesta['X-Content-Type-Options'] = 'nosniff'
+    return respuesta
+
+
+@login_required
+@require_http_methods(["GET"])
+@cache_control(private=True, max_age=ICONOS_MAX_AGE)
+@condition(etag_func=lambda request, habilidad_id: _etag_icono(
+    request, obtener_icono(Habilidad, 'icono', habilidad_id)))
+def icono_habilidad(request, habilidad_id):
+    """Icono de una habilidad; `?tam=32|64|128` pide una miniatura."""
+    icono = obtener_icono(Habilidad, 'icono', habilidad_id)
+    return _respuesta_icono(request, icono, f'habilidad-{habilidad_id}')
+
+
+@login_required
+@require_http_methods(["GET"])
+@cache_control(private=True, max_age=ICONOS_MAX_AGE)
+@condition(etag_func=lambda request, trofeo_id: _etag_icono(
+    request, obtener_icono(Trofeo, 'icono_trofeo', trofeo_id)))
+def icono_trofeo(request, trofeo_id):
+    """Icono de un trofeo; `?tam=32|64|128` pide una miniatura."""
+    icono = obtener_icono(Trofeo, 'icono_trofeo', trofeo_id)
+    return _respuesta_icono(request, icono, f'trofeo-{trofeo_id}')
@@ -10,28 +10,25 @@ def environment(request):
     return {"ENVIRONMENT": settings.ENVIRONMENT}
 
 
+# Role names (Rol.tipo) mapped to the sidebar roles
+SIDEBAR_ROLES = {
+    "Administrador": "administrador",
+    "Profesor": "profesor",
+    "Estudiante": "estudiante",
+}
+
+
 def _resolve_user_role(request) -> str:
-    # Primero verificar si el rol está en la sesión (viene del backend de autenticación)
-    if 'user_role' in request.session:
-        return request.session['user_role']
-        
-    # Si no está en la sesión, usar la lógica existente
+    # request.user comes from CustomAuthBackend.get_user with its role already
+    # joined, so reading user.rol does not query the database
     user = getattr(request, "user", None)
 
     if not user or not user.is_authenticated:
         return "guest"
- 
-
-    if user.rol.tipo == "Administrador":
-        return "administrador"
-
-    if user.rol.tipo == "Profesor":
-        return "profesor"
-
-    if user.rol.tipo == "Estudiante":
-        return "estudiante"
 
-    return "default"
+    # Antes se leía primero request.session['user_role'], que no se enteraba
+    # de un cambio de rol hecho con editar_usuario
+    return SIDEBAR_ROLES.get(user.rol.tipo, "default")
 
 
 def sidebar_menu(request) -> Dict[str, str]:
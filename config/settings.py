@@ -149,6 +149,40 @@
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Local-memory by default; set CACHE_BACKEND to e.g.
+# django.core.cache.backends.filebased.FileBasedCache (with CACHE_LOCATION as
+# a directory) to share the cached catalogs between workers.
+#
+# The catalogs, the per-student snapshots (apps/misiones/snapshot.py), the
+# cached users and the mission card fragments are invalidated by bumping
+# version keys in this cache. With the local-memory backend a bump only
+# reaches the process that made the write, so it is only correct with a
+# single process (gunicorn-cfg.py and the default gunicorn command use one
+# worker). Running more workers or processes requires a shared backend.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'matelab'),
+        # The mission card fragments add one entry per mission, state and role
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 5000))},
+    }
+}
+
+# Lifetime in seconds of the cached reference tables (web_project/catalogos.py)
+CATALOGOS_TIMEOUT = int(os.getenv('CATALOGOS_TIMEOUT', 60 * 60))
+
+# Lifetime in seconds of the cached authenticated user + role (apps/authentication/usuarios.py)
+USUARIOS_CACHE_TIMEOUT = int(os.getenv('USUARIOS_CACHE_TIMEOUT', 60))
+
+# Browser cache lifetime of skill/trophy icons, and optional directory for
+# resized thumbnails (requires Pillow)
+ICONOS_MAX_AGE = int(os.getenv('ICONOS_MAX_AGE', 7 * 24 * 60 * 60))
+ICONOS_MINIATURAS_DIR = os.getenv('ICONOS_MINIATURAS_DIR') or None
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
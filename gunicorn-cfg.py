@@ -1,6 +1,7 @@
 # -*- encoding: utf-8 -*-
 
 bind = '0.0.0.0:5005'
+# More than one worker requires a shared CACHE_BACKEND (see CACHES in config/settings.py)
 workers = 1
 accesslog = '-'
 loglevel = 'debug'
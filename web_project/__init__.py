@@ -20,7 +20,6 @@ def init(self, context):
             }
         )
 
-        # Map context variables
-        TemplateHelper.map_context(context)
+        # set_layout already maps the context variables
 
         return context
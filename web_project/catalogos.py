@@ -0,0 +1,113 @@
+"""
+Caché de lectura para las tablas de referencia (misiones, habilidades, roles
+y biblioteca), que cambian muy pocas veces. Cada catálogo se guarda en el
+caché de Django como una lista de diccionarios simples, fácil de serializar
+y compartir entre workers. La clave incluye la versión de cada tabla de la
+que depende; guardar o borrar una fila incrementa esa versión y las entradas
+anteriores dejan de usarse.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from apps.authentication.models import Rol
+from apps.biblioteca.models import Biblioteca, Biblioteca_Contenido
+from apps.misiones.models import Habilidad, Mision
+
+# Segundos que vive una entrada; acota el desfase si una tabla no gestionada
+# por Django se modifica directamente en la base de datos
+CATALOGOS_TIMEOUT = getattr(settings, 'CATALOGOS_TIMEOUT', 60 * 60)
+
+CAMPOS_CONTENIDO = ('tipo', 'tipo_operacion', 'teoria', 'pasos_trucos', 'ejemplo')
+
+
+def _misiones():
+    return Mision.objects.order_by('fecha_creacion', 'mision_id').values(
+        'mision_id', 'titulo', 'descripcion', 'habilidad_id', 'tipo_operacion', 'activa', 'fecha_creacion',
+    )
+
+
+def _habilidades():
+    # El icono (BinaryField) queda fuera para que las entradas sean ligeras
+    return Habilidad.objects.order_by('habilidad_id').values('habilidad_id', 'nombre')
+
+
+def _roles():
+    return Rol.objects.order_by('id').values('id', 'tipo')
+
+
+def _biblioteca():
+    filas = Biblioteca.objects.filter(activo=True).order_by('tipo', 'titulo').values(
+        'biblioteca_id', 'titulo', 'descripcion', 'solucion', 'tipo',
+        *(f'detalle_contenido__{campo}' for campo in CAMPOS_CONTENIDO),
+    )
+    contenidos = []
+    for fila in filas:
+        detalle = {campo: fila.pop(f'detalle_contenido__{campo}') for campo in CAMPOS_CONTENIDO}
+        fila['detalle_contenido'] = detalle if any(v is not None for v in detalle.values()) else None
+        contenidos.append(fila)
+    return contenidos
+
+
+# nombre -> (tablas de las que depende, consulta)
+CATALOGOS = {
+    'misiones': ((Mision,), _misiones),
+    'habilidades': ((Habilidad,), _habilidades),
+    'roles': ((Rol,), _roles),
+    'biblioteca': ((Biblioteca, Biblioteca_Contenido), _biblioteca),
+}
+
+
+def obtener_version(clave):
+    """Valor actual de un contador de versión guardado en el caché."""
+    version = cache.get(clave)
+    if version is None:
+        # Se parte de una marca de tiempo para no reutilizar una versión antigua
+        # si la clave se expulsó del caché
+        cache.add(clave, time.time_ns(), timeout=None)
+        version = cache.get(clave, time.time_ns())
+    return version
+
+
+def incrementar_version(clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, time.time_ns(), timeout=None)
+
+
+def _clave_version(modelo):
+    return f'catalogos:version:{modelo._meta.db_table}'
+
+
+def version_tabla(modelo):
+    return obtener_version(_clave_version(modelo))
+
+
+def invalidar_tabla(modelo):
+    incrementar_version(_clave_version(modelo))
+
+
+def obtener_catalogo(nombre):
+    """Filas del catálogo `nombre` como lista de diccionarios, desde el caché si es posible."""
+    modelos, consulta = CATALOGOS[nombre]
+    versiones = '.'.join(str(version_tabla(modelo)) for modelo in modelos)
+    clave = f'catalogos:{nombre}:{versiones}'
+    filas = cache.get(clave)
+    if filas is None:
+        filas = list(consulta())
+        cache.set(clave, filas, timeout=CATALOGOS_TIMEOUT)
+    return filas
+
+
+def _al_cambiar(sender, **kwargs):
+    # Tras el commit, para que nadie vuelva a cachear los datos anteriores
+    transaction.on_commit(lambda: invalidar_tabla(sender))
+
+
+for _modelo in {modelo for modelos, _consulta in CATALOGOS.values() for modelo in modelos}:
+    post_save.connect(_al_cambiar, sender=_modelo, dispatch_uid=f'catalogos_save_{_modelo._meta.db_table}')
+    post_delete.connect(_al_cambiar, sender=_modelo, dispatch_uid=f'catalogos_delete_{_modelo._meta.db_table}')
@@ -1,5 +1,5 @@
 from django.conf import settings
-from pprint import pprint
+from functools import lru_cache
 import os
 from importlib import import_module, util
 
@@ -12,18 +12,10 @@ def map_context(context):
 
         #! Menu Fixed (vertical support only)
         if context.get("layout") == "vertical":
-            if context.get("menu_fixed") is True:
-                context["menu_fixed_class"] = "layout-menu-fixed"
-            else:
-                context["menu_fixed_class"] = ""
+            context["menu_fixed_class"] = MENU_FIXED_CLASSES[context.get("menu_fixed") is True]
 
         # Content Layout
-        if context.get("content_layout") == "wide":
-            context["container_class"] = "container-fluid"
-            context["content_layout_class"] = "layout-wide"
-        else:
-            context["container_class"] = "container-xxl"
-            context["content_layout_class"] = "layout-compact"
+        context.update(CONTENT_LAYOUT_CLASSES[context.get("content_layout") == "wide"])
 
 
     # Get theme variables by scope
@@ -35,28 +27,43 @@ def set_layout(view, context={}):
         # Extract layout from the view path
         layout = os.path.splitext(view)[0].split("/")[0]
 
+        # Merge the precomputed context of the layout bootstrap file
+        context.update(TemplateHelper.get_layout_defaults(layout))
+        TemplateHelper.map_context(context)
+
+        return f"{settings.THEME_LAYOUT_DIR}/{view}"
+
+    # Context set by a layout bootstrap file, resolved once per layout
+    @lru_cache(maxsize=None)
+    def get_layout_defaults(layout):
+        TemplateBootstrap = TemplateHelper.get_layout_bootstrap(layout)
+        # The bootstrap files only set static values, so they are run once on an
+        # empty context and the result is reused for every request
+        return TemplateBootstrap.init({})
+
+    # Bootstrap class of a layout, or the default one if the layout has none
+    def get_layout_bootstrap(layout):
         # Get module path
         module = f"templates.{settings.THEME_LAYOUT_DIR.replace('/', '.')}.bootstrap.{layout}"
 
         # Check if the bootstrap file is exist
         if util.find_spec(module) is not None:
-            # Auto import and init the default bootstrap.py file from the theme
-            TemplateBootstrap = TemplateHelper.import_class(
+            return TemplateHelper.import_class(
                 module, f"TemplateBootstrap{layout.title().replace('_', '')}"
             )
-            TemplateBootstrap.init(context)
-        else:
-            module = f"templates.{settings.THEME_LAYOUT_DIR.replace('/', '.')}.bootstrap.default"
 
-            TemplateBootstrap = TemplateHelper.import_class(
-                module, "TemplateBootstrapDefault"
-            )
-            TemplateBootstrap.init(context)
-
-        return f"{settings.THEME_LAYOUT_DIR}/{view}"
+        module = f"templates.{settings.THEME_LAYOUT_DIR.replace('/', '.')}.bootstrap.default"
+        return TemplateHelper.import_class(module, "TemplateBootstrapDefault")
 
     # Import a module by string
     def import_class(fromModule, import_className):
-        pprint(f"Loading {import_className} from {fromModule}")
         module = import_module(fromModule)
         return getattr(module, import_className)
+
+
+# Class names used by map_context
+MENU_FIXED_CLASSES = {True: "layout-menu-fixed", False: ""}
+CONTENT_LAYOUT_CLASSES = {
+    True: {"container_class": "container-fluid", "content_layout_class": "layout-wide"},
+    False: {"container_class": "container-xxl", "content_layout_class": "layout-compact"},
+}